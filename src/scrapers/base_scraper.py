@@ -1,11 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, List
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Tuple
+import os
 import re
-import urllib.request
+import json
 import ssl
+import zlib
+import gzip
+import base64
+import hashlib
+import threading
 import time
+import random
 import asyncio
 from functools import wraps
+from urllib.parse import urlparse
+
+import aiohttp
 
 # ============================================================================
 # Retry Decorator
@@ -173,26 +183,605 @@ class Product:
             "description": self.description
         }
 
+# ============================================================================
+# HTTP Client
+# ============================================================================
+
+class HTTPStatusError(Exception):
+    """Raised when a store answers with a non-2xx status code."""
+    def __init__(self, url: str, status: int):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+class RateLimiter:
+    """Async token bucket shared by every request to the same host.
+
+    rate: sustained requests/second (<= 0 disables the limit).
+    burst: maximum number of tokens that can accumulate while idle.
+    jitter: (min, max) extra random delay in seconds added after each grant,
+            so request timing does not look mechanical.
+    """
+    def __init__(self, rate: float, burst: int = 1, jitter: Tuple[float, float] = (0.0, 0.0)):
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.jitter = jitter
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+
+    async def acquire(self):
+        """Wait until a request to this host is allowed."""
+        if self.rate > 0:
+            async with self._get_lock():
+                while True:
+                    now = time.monotonic()
+                    if now < self._paused_until:
+                        await asyncio.sleep(self._paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        low, high = self.jitter
+        if high > 0:
+            await asyncio.sleep(random.uniform(low, high))
+
+    def pause(self, seconds: float):
+        """Block the whole host for `seconds` (e.g. after a 403/429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+
+_HOST_LIMITERS: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(host: str, rate: float, burst: int = 1,
+                     jitter: Tuple[float, float] = (0.0, 0.0)) -> RateLimiter:
+    """Return the process-wide limiter for `host`, creating it on first use."""
+    limiter = _HOST_LIMITERS.get(host)
+    if limiter is None:
+        limiter = RateLimiter(rate, burst, jitter)
+        _HOST_LIMITERS[host] = limiter
+    return limiter
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency governor, usable as `async with governor:`.
+
+    The limit grows additively (+1 every `limit` fast 2xx responses) and is
+    halved on throttling signals (403/429/503 or timeouts), never below
+    `minimum` nor above `maximum`. Consecutive failures within `cooldown`
+    seconds only count once, so a single burst of errors halves once.
+    """
+    THROTTLE_STATUSES = {403, 429, 503}
+
+    def __init__(self, name: str, initial: int = 2, minimum: int = 1, maximum: int = 16,
+                 latency_target: float = 2.0, cooldown: float = 5.0):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self._active = 0
+        self._last_decrease = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _get_cond(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    async def __aenter__(self):
+        cond = self._get_cond()
+        async with cond:
+            await cond.wait_for(lambda: self._active < int(self.limit))
+            self._active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        cond = self._get_cond()
+        async with cond:
+            self._active -= 1
+            cond.notify_all()
+
+    def _set_limit(self, value: float):
+        old = int(self.limit)
+        self.limit = min(max(value, float(self.minimum)), float(self.maximum))
+        if int(self.limit) != old:
+            print(f"    [AIMD] {self.name}: concurrencia {old} → {int(self.limit)}")
+
+    def record_success(self, latency: float):
+        """Fast 2xx responses grow the limit; slow ones leave it untouched."""
+        if latency <= self.latency_target:
+            self._set_limit(self.limit + 1.0 / self.limit)
+
+    def record_throttle(self):
+        """Multiplicative decrease on 403/429/503 or timeouts."""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit / 2)
+
+
+def _ssl_ctx() -> ssl.SSLContext:
+    """Shared TLS context (stores are scraped without certificate checks)."""
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+class HTTPCache:
+    """On-disk conditional-GET cache.
+
+    Each URL is stored as one zlib-compressed file (named after the SHA-256 of
+    the URL) holding a small JSON header with the validators (ETag,
+    Last-Modified) followed by the response body. Cached entries are sent back
+    to the store as If-None-Match / If-Modified-Since, and a 304 answer is
+    served from disk, so unchanged pages cost a header round trip instead of
+    a full download.
+
+    get() and put() do blocking file I/O and (de)compression; BaseScraper runs
+    them in a worker thread so they never stall the event loop.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + '.z')
+
+    def get(self, url: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+        """Return (validators, body) for `url`, or None if not cached/unreadable."""
+        try:
+            with open(self._path(url), 'rb') as f:
+                raw = zlib.decompress(f.read())
+            header, body = raw.split(b'\n', 1)
+            meta = json.loads(header.decode('utf-8'))
+        except (OSError, ValueError, zlib.error):
+            return None
+        if meta.get('url') != url:
+            return None
+        return meta.get('validators', {}), body
+
+    def conditional_headers(self, validators: Dict[str, str]) -> Dict[str, str]:
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def put(self, url: str, response_headers, body: bytes) -> bool:
+        """Store `body` if the response carries an ETag or Last-Modified.
+
+        Returns True if the entry was written.
+        """
+        validators = {}
+        if response_headers.get('ETag'):
+            validators['etag'] = response_headers['ETag']
+        if response_headers.get('Last-Modified'):
+            validators['last_modified'] = response_headers['Last-Modified']
+        if not validators:
+            return False
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = json.dumps({'url': url, 'validators': validators}).encode('utf-8')
+        # Unique per writer thread: the same URL may be stored concurrently
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(zlib.compress(header + b'\n' + body, 6))
+            os.replace(tmp, path)
+            return True
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return False
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return f"{self.hits}/{total} hits (304) ({rate:.0f}%), {self.stores} guardadas"
+
+
+class ResponseArchive:
+    """Record/replay transport for running scrapers without network access.
+
+    mode='record': requests go to the stores as usual and every response
+    (status, validators/content-type headers, body) is kept in memory; save()
+    writes them as gzip-compressed JSON lines to `path`.
+
+    mode='replay': responses are served from the archive at `path` and no
+    connection is opened. Requests are matched on method, URL and request
+    body; repeated requests replay the recorded responses in order (the last
+    one is reused once they run out) and unknown requests answer 404.
+    `latency` adds a simulated (min, max) delay in seconds and `error_rate`
+    turns that fraction of responses into 503s. Both are derived from `seed`
+    and the request itself, so a replay is deterministic regardless of how
+    concurrent tasks interleave.
+    """
+    KEPT_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+
+    def __init__(self, path: str, mode: str = 'replay', latency: Tuple[float, float] = (0.0, 0.0),
+                 error_rate: float = 0.0, seed: int = 0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self._entries: Dict[str, List[Tuple[int, Dict[str, str], bytes]]] = {}
+        self._served: Dict[str, int] = {}
+        self.replayed = 0
+        self.missing = 0
+        self.injected_errors = 0
+        if mode == 'replay':
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    @staticmethod
+    def _key(method: str, url: str, data: Optional[bytes]) -> str:
+        digest = hashlib.sha1(data).hexdigest() if data else ''
+        return f"{method} {url} {digest}"
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                self._entries.setdefault(rec['key'], []).append(
+                    (rec['status'], rec['headers'], base64.b64decode(rec['body']))
+                )
+
+    def save(self):
+        """Write the recorded responses to `path` (record mode only)."""
+        if self.mode != 'record':
+            return
+        tmp = f"{self.path}.tmp"
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            for key, responses in self._entries.items():
+                for status, headers, body in responses:
+                    f.write(json.dumps({
+                        'key': key, 'status': status, 'headers': headers,
+                        'body': base64.b64encode(body).decode('ascii'),
+                    }) + '\n')
+        os.replace(tmp, self.path)
+
+    def record(self, method: str, url: str, data: Optional[bytes], status: int,
+               headers, body: bytes):
+        kept = {h: headers[h] for h in self.KEPT_HEADERS if headers.get(h)}
+        self._entries.setdefault(self._key(method, url, data), []).append((status, kept, body))
+
+    async def replay(self, method: str, url: str,
+                     data: Optional[bytes]) -> Tuple[int, Dict[str, str], bytes]:
+        key = self._key(method, url, data)
+        occurrence = self._served.get(key, 0)
+        self._served[key] = occurrence + 1
+        rng = random.Random(f"{self.seed}:{key}:{occurrence}")
+        if self.latency[1] > 0:
+            await asyncio.sleep(rng.uniform(*self.latency))
+        if self.error_rate and rng.random() < self.error_rate:
+            self.injected_errors += 1
+            return 503, {}, b''
+        responses = self._entries.get(key)
+        if not responses:
+            self.missing += 1
+            return 404, {}, b''
+        self.replayed += 1
+        return responses[min(occurrence, len(responses) - 1)]
+
+    def summary(self) -> str:
+        if self.mode == 'record':
+            total = sum(len(r) for r in self._entries.values())
+            return f"{total} respuestas grabadas en {self.path}"
+        return (f"{self.replayed} respuestas reproducidas, {self.missing} sin grabar, "
+                f"{self.injected_errors} errores inyectados")
+
+
 class BaseScraper(ABC):
     """
-    Base class for all scrapers. 
-    Removed Playwright dependency as current scrapers use HTTP/urllib.
+    Base class for all scrapers.
+
+    Owns a pooled keep-alive aiohttp session (created in init(), released in
+    close()) so every request of a sync reuses the same TCP/TLS connections.
+    Responses are transparently decompressed (gzip/deflate, and br when the
+    Brotli package is installed).
+
+    Every request first awaits the per-host RateLimiter, so politeness is
+    enforced across all concurrent tasks hitting the same store. When an
+    AdaptiveConcurrency governor is attached (`self.concurrency`), response
+    status and latency are reported to it. When an HTTPCache is attached
+    (`self.http_cache`), GET requests are revalidated with conditional headers
+    and 304 answers are served from disk. When a ResponseArchive is attached
+    (`self.archive`), responses are recorded to it or replayed from it without
+    touching the network (replayed requests also skip the rate limiter).
     """
-    def __init__(self):
+
+    # Connection pool limits (per scraper instance, i.e. per store)
+    max_connections: int = 20
+    max_connections_per_host: int = 8
+    request_timeout: float = 30.0
+
+    # Politeness defaults; each store scraper sets its own limits and
+    # STORE_CONFIGS in sync_catalog can override them per run
+    rate_limit: float = 2.0
+    rate_burst: int = 2
+    rate_jitter: Tuple[float, float] = (0.0, 0.0)
+
+    def __init__(self, rate_limit: Optional[float] = None, rate_burst: Optional[int] = None,
+                 rate_jitter: Optional[Tuple[float, float]] = None,
+                 http_cache: Optional[HTTPCache] = None,
+                 archive: Optional[ResponseArchive] = None):
         self.user_agent = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        self.http_cache = http_cache
+        self.archive = archive
+        if rate_limit is not None:
+            self.rate_limit = rate_limit
+        if rate_burst is not None:
+            self.rate_burst = rate_burst
+        if rate_jitter is not None:
+            self.rate_jitter = tuple(rate_jitter)
+
+    def rate_limiter(self, url: str) -> RateLimiter:
+        """Shared limiter for the host of `url`."""
+        return get_rate_limiter(urlparse(url).netloc, self.rate_limit,
+                                self.rate_burst, self.rate_jitter)
+
+    def throttle(self, url: str, seconds: float):
+        """Back off every pending request to the host of `url`."""
+        self.rate_limiter(url).pause(seconds)
 
     async def init(self):
-        """No-op for compatibility."""
-        pass
+        """Create the shared HTTP session (idempotent)."""
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            ssl=_ssl_ctx(),
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            headers={
+                'User-Agent': self.user_agent,
+                'Accept-Encoding': 'gzip, deflate, br',
+            },
+        )
 
     async def close(self):
-        """No-op for compatibility."""
-        pass
+        """Close the HTTP session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                       data: Optional[bytes] = None, timeout: Optional[float] = None,
+                       conditional: bool = True) -> bytes:
+        """Perform a request through the pooled session and return the raw body.
+
+        Raises HTTPStatusError on non-2xx responses. A 304 with no cached body
+        to serve is treated as a cache miss and the URL is fetched again
+        without conditional headers (conditional=False).
+        """
+        cached = None
+        if self.http_cache is not None and method == 'GET' and conditional:
+            cached = await asyncio.to_thread(self.http_cache.get, url)
+            if cached is not None:
+                headers = {**(headers or {}), **self.http_cache.conditional_headers(cached[0])}
+        if self.archive is None or not self.archive.replaying:
+            await self.rate_limiter(url).acquire()
+        started = time.monotonic()
+        try:
+            status, resp_headers, body = await self._send(method, url, headers, data, timeout)
+        except asyncio.TimeoutError:
+            if self.concurrency:
+                self.concurrency.record_throttle()
+            raise
+        if self.concurrency:
+            if status in AdaptiveConcurrency.THROTTLE_STATUSES:
+                self.concurrency.record_throttle()
+            elif status < 400:
+                self.concurrency.record_success(time.monotonic() - started)
+        if status == 304:
+            if cached is not None:
+                self.http_cache.hits += 1
+                return cached[1]
+            if conditional:
+                plain = {k: v for k, v in (headers or {}).items()
+                         if k.lower() not in ('if-none-match', 'if-modified-since')}
+                return await self._request(method, url, plain, data, timeout, conditional=False)
+            raise HTTPStatusError(url, status)
+        if status >= 400:
+            raise HTTPStatusError(url, status)
+        if self.http_cache is not None and method == 'GET':
+            self.http_cache.misses += 1
+            if await asyncio.to_thread(self.http_cache.put, url, resp_headers, body):
+                self.http_cache.stores += 1
+        return body
+
+    async def _send(self, method: str, url: str, headers: Optional[Dict[str, str]],
+                    data: Optional[bytes], timeout: Optional[float]):
+        """Transport: return (status, headers, body) from the archive or the network."""
+        if self.archive is not None and self.archive.replaying:
+            return await self.archive.replay(method, url, data)
+        if self._session is None or self._session.closed:
+            await self.init()
+        req_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        async with self._session.request(method, url, headers=headers, data=data,
+                                         timeout=req_timeout) as resp:
+            body = await resp.read()
+            status = resp.status
+            resp_headers = resp.headers
+        if self.archive is not None:
+            self.archive.record(method, url, data, status, resp_headers, body)
+        return status, resp_headers, body
+
+    async def fetch_text(self, url: str, headers: Optional[Dict[str, str]] = None,
+                         timeout: Optional[float] = None) -> str:
+        body = await self._request('GET', url, headers=headers, timeout=timeout)
+        return body.decode('utf-8', errors='replace')
+
+    async def fetch_json(self, url: str, headers: Optional[Dict[str, str]] = None,
+                         timeout: Optional[float] = None) -> Any:
+        body = await self._request('GET', url, headers=headers, timeout=timeout)
+        return json.loads(body.decode('utf-8'))
+
+    async def post_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None,
+                        timeout: Optional[float] = None) -> Any:
+        req_headers = {'Content-Type': 'application/json'}
+        req_headers.update(headers or {})
+        body = await self._request('POST', url, headers=req_headers,
+                                   data=json.dumps(payload).encode('utf-8'), timeout=timeout)
+        return json.loads(body.decode('utf-8'))
 
     @abstractmethod
     async def scrape_product(self, url: str) -> Optional[Product]: 
         pass
 
+    # Listing pages requested concurrently by paginate()
+    page_window: int = 4
+
+    async def paginate(self, fetch_page: Callable[[int], Awaitable[list]], max_pages: int,
+                       start: int = 1) -> list:
+        """Fetch listing pages start..max_pages in parallel windows of `page_window`.
+
+        Stops at the first empty or failed page (later pages of the same window
+        are discarded) and returns the items of all previous pages, in order.
+        """
+        name = type(self).__name__.replace('Scraper', '')
+        items: list = []
+        page = start
+        while page <= max_pages:
+            window = list(range(page, min(page + self.page_window, max_pages + 1)))
+            results = await asyncio.gather(*(fetch_page(n) for n in window), return_exceptions=True)
+            for page_num, result in zip(window, results):
+                if isinstance(result, Exception):
+                    print(f"[{name}] Error on page {page_num}: {result}")
+                    return items
+                if not result:
+                    print(f"[{name}] No more products on page {page_num}. Done.")
+                    return items
+                items.extend(result)
+                print(f"[{name}] Page {page_num}: {len(result)} items. Total: {len(items)}")
+            page += len(window)
+        print(f"[{name}] Reached last page ({max_pages}). Stopping.")
+        return items
+
+    # True when scrape_catalog() builds Products straight from listing pages
+    supports_bulk_catalog: bool = False
+
+    async def scrape_catalog(self, url: str, limit: Optional[int] = None,
+                             concurrency=None) -> List[Product]:
+        """Scrape full Products for a category.
+
+        Default: discover URLs with scrape_category() and call scrape_product()
+        for each one, bounded by `concurrency` (Semaphore/AdaptiveConcurrency).
+        Stores with a bulk listing API override this.
+        """
+        urls = await self.scrape_category(url)
+        if limit:
+            urls = urls[:limit]
+        limiter = concurrency or asyncio.Semaphore(2)
+
+        async def scrape_one(product_url: str) -> Optional[Product]:
+            async with limiter:
+                try:
+                    return await self.scrape_product(product_url)
+                except Exception as e:
+                    print(f"    ❌ Error en {product_url}: {e}")
+                    return None
+
+        results = await asyncio.gather(*(scrape_one(u) for u in urls))
+        return [p for p in results if p]
+
+    # True when fetch_price_feed() can price a whole category in a few requests
+    supports_price_feed: bool = False
+
+    def price_feed_key(self, url: str) -> Optional[str]:
+        """Key used to join a known product URL against fetch_price_feed()."""
+        return None
+
+    async def fetch_price_feed(self, url: str, known_urls: Optional[List[str]] = None) -> Dict[str, Product]:
+        """Products of a whole category keyed by price_feed_key(product.url).
+
+        `known_urls` lets stores that can look products up in batches also
+        resolve URLs that are no longer listed in the category.
+        Only price fields are guaranteed; specs may be incomplete.
+        """
+        return {}
+
+    def _needs_detail(self, product: Product) -> bool:
+        """Whether a Product built from listing data needs a per-product request."""
+        return 'Forma' not in product.specs
+
+    async def _complete_specs(self, product: Product, product_data: dict) -> Product:
+        """Hook to finish a listing-built Product (default: normalize specs)."""
+        product.specs = normalize_specs(product.specs)
+        return product
+
+    async def complete_products(self, pending: List[Tuple[Product, dict]],
+                                concurrency=None) -> List[Product]:
+        """Run _complete_specs over (Product, raw data) pairs built in bulk.
+
+        Only products flagged by _needs_detail() take a `concurrency` slot,
+        since the rest are completed without any network request.
+        """
+        limiter = concurrency or asyncio.Semaphore(2)
+        name = type(self).__name__.replace('Scraper', '')
+
+        async def complete_one(product: Product, product_data: dict) -> Optional[Product]:
+            try:
+                if not self._needs_detail(product):
+                    return await self._complete_specs(product, product_data)
+                async with limiter:
+                    return await self._complete_specs(product, product_data)
+            except Exception as e:
+                print(f"[{name}] Error completing {product.url}: {e}")
+                return None
+
+        needs_detail = sum(1 for product, _ in pending if self._needs_detail(product))
+        print(f"[{name}] {len(pending)} products from listing, {needs_detail} need a detail fetch")
+        results = await asyncio.gather(*(complete_one(p, d) for p, d in pending))
+        return [p for p in results if p]
+
     @abstractmethod
     async def scrape_category(self, url: str) -> List[str]: 
         pass
\ No newline at end of file
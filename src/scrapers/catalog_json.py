@@ -0,0 +1,97 @@
+"""
+catalog_json.py — Serialización de rackets.json.
+
+Usa orjson cuando está instalado y la librería estándar en caso contrario.
+La salida por defecto es la misma que json.dump(data, indent=4,
+ensure_ascii=False), el formato que commitea el workflow de sincronización
+(solo difieren floats en notación exponencial, p. ej. 1e-07 frente a 1e-7,
+que no aparecen en precios). compact=True escribe sin espacios.
+"""
+
+import json
+import os
+import tempfile
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def _reindent(out: bytes) -> bytes:
+    """Pasa la sangría de orjson (2 espacios por nivel) a 4 espacios.
+
+    Los saltos de línea dentro de strings siempre van escapados, así que todo
+    espacio tras un salto de línea es sangría. En la pasada k las líneas de
+    nivel >= k tienen al menos 4k-2 espacios y las de nivel k-1 exactamente
+    4k-4, así que basta con un replace por nivel.
+    """
+    level = 1
+    while True:
+        pattern = b"\n" + b" " * (4 * level - 2)
+        if pattern not in out:
+            return out
+        out = out.replace(pattern, pattern + b"  ")
+        level += 1
+
+
+def loads(raw: bytes) -> Any:
+    if orjson:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def dumps(data: Any, compact: bool = False) -> bytes:
+    if orjson:
+        try:
+            if compact:
+                return orjson.dumps(data)
+            return _reindent(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        except TypeError:
+            # Tipos que orjson no serializa (p. ej. enteros > 64 bits)
+            pass
+    if compact:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, indent=4, ensure_ascii=False)
+    return text.encode("utf-8")
+
+
+def load(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump(data: Any, path: str, compact: bool = False):
+    """Escritura atómica: fichero temporal en el mismo directorio, fsync y
+    os.replace, de modo que un corte a mitad deja intacto el fichero anterior."""
+    directory = os.path.dirname(os.path.abspath(path))
+    payload = dumps(data, compact)
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea el fichero con 0600; conservar los permisos del original
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    # Persistir también la entrada del directorio (el rename)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -20,6 +20,7 @@ import re
 import os
 import argparse
 import unicodedata
+from datetime import datetime, timezone
 
 from dotenv import load_dotenv
 from supabase import create_client, Client
@@ -230,7 +231,11 @@ def _strip_pala_noise(s: str) -> str:
     return s
 
 
-def _clean_pala_names(client: Client, rows: list, dry_run: bool) -> int:
+def _now_utc() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _clean_pala_names(client: Client, rows: list, dry_run: bool, touched: set | None = None) -> int:
     """Strip stray (pala) noise from name/model fields. Returns count of rows fixed."""
     fixed = 0
     for r in rows:
@@ -244,12 +249,20 @@ def _clean_pala_names(client: Client, rows: list, dry_run: bool) -> int:
         if updates:
             print(f"  clean id={r['id']} '{r.get('name')}' → '{name_clean}'")
             if not dry_run:
-                client.table("rackets").update(updates).eq("id", r["id"]).execute()
+                client.table("rackets").update({**updates, "updated_at": _now_utc()}).eq("id", r["id"]).execute()
+                if touched is not None:
+                    touched.add(r.get("slug"))
             fixed += 1
     return fixed
 
 
-def run(dry_run: bool):
+def run(dry_run: bool) -> set:
+    """
+    Run the deduplication. Every row written here gets a fresh updated_at so
+    that sync_catalog's synced_hashes.json notices the change; returns the
+    slugs of the rows updated or deleted.
+    """
+    touched: set = set()
     client = create_client(SUPABASE_URL, SUPABASE_KEY)
     print("Fetching rackets...")
     rows = fetch_all_rackets(client)
@@ -257,7 +270,7 @@ def run(dry_run: bool):
 
     # Strip (pala) noise from names before any other processing
     print("\nCleaning (pala) noise from names...")
-    cleaned = _clean_pala_names(client, rows, dry_run)
+    cleaned = _clean_pala_names(client, rows, dry_run, touched)
     if cleaned:
         print(f"  Fixed: {cleaned} rackets")
         # Re-fetch so subsequent steps work with clean names
@@ -275,6 +288,7 @@ def run(dry_run: bool):
             print(f"  delete id={r['id']} name={r.get('name') or r.get('model')}")
             if not dry_run:
                 client.table("rackets").delete().eq("id", r["id"]).execute()
+                touched.add(r.get("slug"))
         print()
     rows = adult_rows
 
@@ -335,13 +349,17 @@ def run(dry_run: bool):
 
         if canonical_update:
             if not dry_run:
-                client.table("rackets").update(canonical_update).eq("id", canonical["id"]).execute()
+                client.table("rackets").update(
+                    {**canonical_update, "updated_at": _now_utc()}
+                ).eq("id", canonical["id"]).execute()
+                touched.add(canonical.get("slug"))
             print(f"  updated canonical: {list(canonical_update.keys())}")
             merged += 1
 
         for dup in duplicates:
             if not dry_run:
                 client.table("rackets").delete().eq("id", dup["id"]).execute()
+                touched.add(dup.get("slug"))
             print(f"  deleted id={dup['id']} slug={dup['slug']}")
             deleted += 1
 
@@ -350,6 +368,8 @@ def run(dry_run: bool):
     print(f"Done. Canonicals updated: {merged} | Duplicates deleted: {deleted}")
     if dry_run:
         print("(DRY-RUN — no changes written)")
+    touched.discard(None)
+    return touched
 
 
 if __name__ == "__main__":
@@ -1,7 +1,5 @@
 import json
 import re
-import urllib.request
-import ssl
 import asyncio
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
@@ -11,6 +9,22 @@ from .base_scraper import BaseScraper, Product, clean_price, normalize_specs, is
 class PadelNuestroScraper(BaseScraper):
     """Scraper for PadelNuestro online store using GraphQL API."""
 
+    rate_limit = 4.0
+    rate_burst = 4
+    rate_jitter = (0.0, 0.0)
+    supports_bulk_catalog = True
+    supports_price_feed = True
+
+    _BASE_URL = "https://www.padelnuestro.com"
+    # Magento category used for catalog queries and GraphQL page sizes
+    _CATEGORY_URL_PATH = "palas-padel"
+    _GRAPHQL_PAGE_SIZE = 100
+    _GRAPHQL_MAX_PAGES = 40
+    _URL_KEY_BATCH = 50
+    # Magento attribute holding the brand (option ID, resolved via customAttributeMetadata)
+    _BRAND_ATTRIBUTE = "manufacturer"
+    _brand_options: Optional[Dict[str, str]] = None
+
     # ── Magento option‑ID → human‑readable label mappings ──────────────
     _ATTR_OPTIONS: Dict[str, Dict[str, str]] = {
         "padelracket_balance": {
@@ -109,49 +123,27 @@ class PadelNuestroScraper(BaseScraper):
         options = self._ATTR_OPTIONS.get(field, {})
         return options.get(str(raw_value))
 
-    def _fetch_graphql(self, query: str) -> dict:
-        """Execute a GraphQL query against PadelNuestro API (sync)."""
-        data = json.dumps({"query": query}).encode("utf-8")
-        req = urllib.request.Request(
-            "https://www.padelnuestro.com/graphql",
-            data=data,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Store": "es",
-                "Origin": "https://www.padelnuestro.com",
-                "Referer": "https://www.padelnuestro.com/palas-padel",
-                "Connection": "keep-alive",
-                "User-Agent": (
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/122.0.0.0 Safari/537.36"
-                ),
-            },
-        )
-
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-
+    _BROWSER_UA = (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    )
+
+    async def _fetch_graphql(self, query: str) -> dict:
+        """Execute a GraphQL query against PadelNuestro API."""
+        headers = {
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+            "Store": "es",
+            "Origin": "https://www.padelnuestro.com",
+            "Referer": "https://www.padelnuestro.com/palas-padel",
+            "User-Agent": self._BROWSER_UA,
+        }
         try:
-            with urllib.request.urlopen(req, timeout=30, context=ctx) as resp:
-                raw = resp.read()
-                # Descomprimir gzip si el servidor lo devuelve comprimido
-                encoding = resp.headers.get("Content-Encoding", "")
-                if encoding == "gzip":
-                    import gzip
-                    raw = gzip.decompress(raw)
-                elif encoding == "br":
-                    try:
-                        import brotli
-                        raw = brotli.decompress(raw)
-                    except ImportError:
-                        pass  # Si no está brotli, intentar decodificar igualmente
-                data = json.loads(raw.decode("utf-8"))
-                return data if data is not None else {}
+            data = await self.post_json(
+                "https://www.padelnuestro.com/graphql", {"query": query}, headers=headers
+            )
+            return data if data is not None else {}
         except Exception as e:
             print(f"[PadelNuestro] GraphQL Error: {e}")
             return {}
@@ -241,7 +233,7 @@ class PadelNuestroScraper(BaseScraper):
 
         return specs
 
-    def _scrape_price_from_html(self, url: str) -> Optional[tuple]:
+    async def _scrape_price_from_html(self, url: str) -> Optional[tuple]:
         """
         Fallback: extrae el precio directamente del HTML de la página del producto.
         Se usa cuando la API GraphQL devuelve 403.
@@ -252,31 +244,14 @@ class PadelNuestroScraper(BaseScraper):
           2. Atributo data-price-amount de Magento 2
           3. Span con clase 'price' (texto con €)
         """
-        req = urllib.request.Request(
-            url,
-            headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/122.0.0.0 Safari/537.36"
-                ),
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "es-ES,es;q=0.9",
-                "Referer": "https://www.padelnuestro.com/palas-padel",
-            },
-        )
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-
+        headers = {
+            "User-Agent": self._BROWSER_UA,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "es-ES,es;q=0.9",
+            "Referer": "https://www.padelnuestro.com/palas-padel",
+        }
         try:
-            with urllib.request.urlopen(req, timeout=20, context=ctx) as resp:
-                raw = resp.read()
-                encoding = resp.headers.get("Content-Encoding", "")
-                if encoding == "gzip":
-                    import gzip as _gzip
-                    raw = _gzip.decompress(raw)
-                html = raw.decode("utf-8", errors="replace")
+            html = await self.fetch_text(url, headers=headers, timeout=20)
         except Exception as e:
             print(f"[PadelNuestro] HTML fetch error for {url}: {e}")
             return None
@@ -332,6 +307,12 @@ class PadelNuestroScraper(BaseScraper):
 
         return price, original_price
 
+    # Non-racket products that also show up in the rackets category
+    _EXCLUDE_TERMS = {
+        "zapatilla", "paletero", "mochila", "camiseta", "pantalon",
+        "falda", "gorra", "calcetin", "funda", "overgrip", "protector",
+    }
+
     _COMMON_BRANDS = [
         "Nox", "Bullpadel", "Adidas", "Siux", "Head", "Babolat",
         "StarVie", "Varlion", "Kuikma", "Wilson", "Drop Shot",
@@ -341,31 +322,24 @@ class PadelNuestroScraper(BaseScraper):
         "Softee", "Akkeron", "Eme", "Cartri",
     ]
 
-    def _fetch_html(self, url: str) -> Optional[str]:
-        """Fetch page HTML via plain HTTP (sync)."""
-        req = urllib.request.Request(
-            url,
-            headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/122.0.0.0 Safari/537.36"
-                ),
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "es-ES,es;q=0.9",
-            },
-        )
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+    def _brand_from_name(self, name: str) -> str:
+        """Guess the brand from the product name (known brands, else first word)."""
+        name_upper = name.upper()
+        for b in self._COMMON_BRANDS:
+            # Whole words only: "Eme" must not match inside "XTREME"
+            if re.search(r'(?<!\w)' + re.escape(b.upper()) + r'(?!\w)', name_upper):
+                return b
+        return name.split(" ")[0].title()
+
+    async def _fetch_html(self, url: str) -> Optional[str]:
+        """Fetch page HTML through the shared HTTP session."""
+        headers = {
+            "User-Agent": self._BROWSER_UA,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "es-ES,es;q=0.9",
+        }
         try:
-            with urllib.request.urlopen(req, timeout=20, context=ctx) as resp:
-                raw = resp.read()
-                enc = resp.headers.get("Content-Encoding", "")
-                if enc == "gzip":
-                    import gzip
-                    raw = gzip.decompress(raw)
-                return raw.decode("utf-8", errors="replace")
+            return await self.fetch_text(url, headers=headers, timeout=20)
         except Exception as e:
             print(f"[PadelNuestro] HTTP error for {url}: {e}")
             return None
@@ -453,13 +427,7 @@ class PadelNuestroScraper(BaseScraper):
 
         # Fallback brand from name
         if brand == "Unknown" and name:
-            name_upper = name.upper()
-            for b in self._COMMON_BRANDS:
-                if b.upper() in name_upper:
-                    brand = b
-                    break
-            if brand == "Unknown":
-                brand = name.split(" ")[0].title()
+            brand = self._brand_from_name(name)
 
         return Product(
             url=url,
@@ -480,8 +448,7 @@ class PadelNuestroScraper(BaseScraper):
             if url.endswith(".html"):
                 url = url[:-5]
 
-            loop = asyncio.get_event_loop()
-            html = await loop.run_in_executor(None, self._fetch_html, url)
+            html = await self._fetch_html(url)
             if not html:
                 print(f"[PadelNuestro] No HTML for {url}")
                 return None
@@ -495,10 +462,10 @@ class PadelNuestroScraper(BaseScraper):
             print(f"[PadelNuestro] Error scraping product {url}: {e}")
             return None
 
-    def _fetch_category_page(self, page_num: int) -> List[str]:
-        """Fetch one category page and return product URLs (sync)."""
+    async def _fetch_category_page(self, page_num: int) -> List[str]:
+        """Fetch one category page and return product URLs."""
         page_url = f"https://www.padelnuestro.com/palas-padel?p={page_num}"
-        html = self._fetch_html(page_url)
+        html = await self._fetch_html(page_url)
         if not html:
             return []
         # product-item-link hrefs appear in initial HTML (server-rendered)
@@ -508,41 +475,236 @@ class PadelNuestroScraper(BaseScraper):
 
     async def scrape_category(self, url: str) -> List[str]:
         """Scrape product URLs by paginating the category HTML pages."""
-        _EXCLUDE = {
-            "zapatilla", "paletero", "mochila", "camiseta", "pantalon",
-            "falda", "gorra", "calcetin", "funda", "overgrip", "protector",
-        }
+        print("[PadelNuestro] Scraping category via HTML pagination...")
+        links = await self.paginate(self._fetch_category_page, max_pages=40)
 
         product_urls: List[str] = []
         seen: set = set()
-        page_num = 1
-        max_pages = 40
+        for link in links:
+            slug = link.rstrip("/").split("/")[-1].lower()
+            if any(term in slug for term in self._EXCLUDE_TERMS):
+                continue
+            if link not in seen:
+                product_urls.append(link)
+                seen.add(link)
 
-        print("[PadelNuestro] Scraping category via HTML pagination...")
+        print(f"[PadelNuestro] {len(links)} links found, {len(product_urls)} product URLs kept.")
+        return product_urls
 
-        loop = asyncio.get_event_loop()
-        while page_num <= max_pages:
-            links = await loop.run_in_executor(
-                None, self._fetch_category_page, page_num
-            )
-            if not links:
-                print(f"[PadelNuestro] Page {page_num}: no products. Done.")
-                break
+    # ── GraphQL catalog (batched) ───────────────────────────────────────
+
+    def _graphql_products_query(self, filter_clause: str, page: int, page_size: int) -> str:
+        attrs = "\n          ".join(self._FIELD_TO_SPEC)
+        return f"""
+        {{
+          products(filter: {{{filter_clause}}}, pageSize: {page_size}, currentPage: {page}) {{
+            total_count
+            page_info {{ current_page total_pages }}
+            items {{
+              name
+              url_key
+              description {{ html }}
+              small_image {{ url }}
+              media_gallery {{ url }}
+              {self._BRAND_ATTRIBUTE}
+              price_range {{
+                minimum_price {{
+                  regular_price {{ value }}
+                  final_price {{ value }}
+                }}
+              }}
+              {attrs}
+            }}
+          }}
+        }}
+        """
 
-            added = 0
-            for link in links:
-                slug = link.rstrip("/").split("/")[-1].lower()
-                if any(term in slug for term in _EXCLUDE):
-                    continue
-                if link not in seen:
-                    product_urls.append(link)
-                    seen.add(link)
-                    added += 1
-
-            print(
-                f"[PadelNuestro] Page {page_num}: {len(links)} found, "
-                f"{added} added. Total: {len(product_urls)}"
-            )
-            page_num += 1
+    async def _fetch_graphql_products(self, filter_clause: str, page: int,
+                                      page_size: int) -> Optional[dict]:
+        """Run one products() query; None if the API failed or returned errors."""
+        data = await self._fetch_graphql(self._graphql_products_query(filter_clause, page, page_size))
+        if not data or data.get("errors"):
+            if data.get("errors"):
+                print(f"[PadelNuestro] GraphQL errors: {data['errors'][:1]}")
+            return None
+        return (data.get("data") or {}).get("products")
+
+    async def _load_brand_options(self):
+        """Fetch the option‑ID → label map of the brand attribute (once per scraper)."""
+        if self._brand_options is not None:
+            return
+        data = await self._fetch_graphql(f"""
+        {{
+          customAttributeMetadata(attributes: [
+            {{attribute_code: "{self._BRAND_ATTRIBUTE}", entity_type: "4"}}
+          ]) {{
+            items {{ attribute_options {{ value label }} }}
+          }}
+        }}
+        """)
+        items = ((data.get("data") or {}).get("customAttributeMetadata") or {}).get("items") or []
+        self._brand_options = {
+            str(option.get("value")): option.get("label")
+            for attribute in items
+            for option in (attribute or {}).get("attribute_options") or []
+            if option and option.get("label")
+        }
+        if not self._brand_options:
+            print("[PadelNuestro] Brand options unavailable, guessing brands from names.")
 
-        return product_urls
+    def _product_from_graphql(self, item: dict, quiet: bool = False) -> Optional[Product]:
+        """Build a Product from a GraphQL products() item.
+
+        quiet=True skips junior rackets without logging each one.
+        """
+        if not isinstance(item, dict):
+            return None
+        name = item.get("name")
+        url_key = item.get("url_key")
+        if not name or not url_key:
+            return None
+        if any(term in url_key.lower() for term in self._EXCLUDE_TERMS):
+            return None
+        if is_junior_racket(name):
+            if not quiet:
+                print(f"[PadelNuestro] Skipping junior racket: {name}")
+            return None
+
+        minimum = ((item.get("price_range") or {}).get("minimum_price") or {})
+        price = float((minimum.get("final_price") or {}).get("value") or 0.0)
+        regular = (minimum.get("regular_price") or {}).get("value")
+        original_price = float(regular) if regular and float(regular) > price else None
+
+        images: List[str] = []
+        for media in item.get("media_gallery") or []:
+            img_url = (media or {}).get("url")
+            if img_url:
+                img_url = re.sub(r'\?.*$', '', img_url)
+                if img_url not in images:
+                    images.append(img_url)
+        small = (item.get("small_image") or {}).get("url")
+        if not images and small:
+            images = [re.sub(r'\?.*$', '', small)]
+        image = images[0] if images else ""
+
+        description_html = (item.get("description") or {}).get("html") or ""
+        specs = self._parse_specs_from_html(description_html)
+        for field, spec_key in self._FIELD_TO_SPEC.items():
+            label = self._resolve_option(field, item.get(field))
+            if label:
+                specs[spec_key] = label
+        specs = normalize_specs(specs)
+
+        # Brand attribute first, as the HTML path uses the JSON-LD brand
+        brand = (self._brand_options or {}).get(str(item.get(self._BRAND_ATTRIBUTE)))
+        if not brand:
+            brand = self._brand_from_name(name)
+
+        return Product(
+            url=f"{self._BASE_URL}/{url_key}",
+            name=name,
+            price=price,
+            original_price=original_price,
+            brand=brand,
+            image=image,
+            images=images,
+            specs=specs,
+            description=description_html,
+        )
+
+    async def _graphql_catalog(self, quiet: bool = False) -> List[Product]:
+        """Every product of the rackets category, _GRAPHQL_PAGE_SIZE per request.
+
+        The first page reports total_pages; the rest are fetched in parallel
+        windows. quiet is passed on to _product_from_graphql.
+        """
+        filter_clause = f'category_url_path: {{eq: {json.dumps(self._CATEGORY_URL_PATH)}}}'
+        await self._load_brand_options()
+
+        async def fetch_page(page_num: int) -> list:
+            result = await self._fetch_graphql_products(filter_clause, page_num, self._GRAPHQL_PAGE_SIZE)
+            if result is None:
+                raise RuntimeError("GraphQL products query failed")
+            return result.get("items") or []
+
+        first = await self._fetch_graphql_products(filter_clause, 1, self._GRAPHQL_PAGE_SIZE)
+        if first is None:
+            return []
+        items = first.get("items") or []
+        total_pages = (first.get("page_info") or {}).get("total_pages") or 1
+        print(f"[PadelNuestro] GraphQL page 1/{total_pages}: {len(items)} items.")
+        if items and total_pages > 1:
+            items += await self.paginate(fetch_page, max_pages=min(total_pages, self._GRAPHQL_MAX_PAGES), start=2)
+
+        products: List[Product] = []
+        for item in items:
+            product = self._product_from_graphql(item, quiet)
+            if product:
+                products.append(product)
+        return products
+
+    async def fetch_products_by_url_keys(self, url_keys: List[str], quiet: bool = False) -> Dict[str, Product]:
+        """Look products up by url_key in batches of _URL_KEY_BATCH per request."""
+        found: Dict[str, Product] = {}
+        keys = list(dict.fromkeys(k for k in url_keys if k))
+        if keys:
+            await self._load_brand_options()
+        for start in range(0, len(keys), self._URL_KEY_BATCH):
+            batch = keys[start:start + self._URL_KEY_BATCH]
+            filter_clause = f"url_key: {{in: {json.dumps(batch)}}}"
+            result = await self._fetch_graphql_products(filter_clause, 1, len(batch))
+            if result is None:
+                continue
+            for item in result.get("items") or []:
+                product = self._product_from_graphql(item, quiet)
+                if product:
+                    found[item["url_key"]] = product
+        return found
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        key = url.split("?")[0].rstrip("/").split("/")[-1]
+        return key[:-5] if key.endswith(".html") else key
+
+    def price_feed_key(self, url: str) -> Optional[str]:
+        return self._url_key(url) or None
+
+    async def fetch_price_feed(self, url: str, known_urls: Optional[List[str]] = None) -> Dict[str, Product]:
+        """Price the whole category via GraphQL, plus known URLs missing from it."""
+        print("[PadelNuestro] Price feed via GraphQL...")
+        feed = {self._url_key(p.url): p for p in await self._graphql_catalog(quiet=True)}
+        missing = [self._url_key(u) for u in known_urls or [] if self._url_key(u) not in feed]
+        if missing:
+            feed.update(await self.fetch_products_by_url_keys(missing, quiet=True))
+        return feed
+
+    async def scrape_catalog(self, url: str, limit: Optional[int] = None,
+                             concurrency=None) -> List[Product]:
+        """Catalog via GraphQL category pages.
+
+        If the category query is rejected, discovers URLs from the HTML
+        listing and resolves them through batched url_key queries; only
+        products still unresolved are scraped one by one from their page.
+        """
+        print("[PadelNuestro] Bulk catalog via GraphQL...")
+        products = await self._graphql_catalog()
+        if products:
+            return products[:limit] if limit else products
+
+        urls = await self.scrape_category(url)
+        if limit:
+            urls = urls[:limit]
+        by_key = await self.fetch_products_by_url_keys([self._url_key(u) for u in urls])
+        products = [by_key[self._url_key(u)] for u in urls if self._url_key(u) in by_key]
+        remaining = [u for u in urls if self._url_key(u) not in by_key]
+        print(f"[PadelNuestro] {len(products)} products via url_key batches, "
+              f"{len(remaining)} scraped individually")
+
+        limiter = concurrency or asyncio.Semaphore(2)
+
+        async def scrape_one(product_url: str) -> Optional[Product]:
+            async with limiter:
+                return await self.scrape_product(product_url)
+
+        results = await asyncio.gather(*(scrape_one(u) for u in remaining))
+        return products + [p for p in results if p]
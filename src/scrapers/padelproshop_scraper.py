@@ -1,67 +1,51 @@
-import json
 import re
-import ssl
-import time
-import random
-import urllib.request
-import urllib.error
-import asyncio
-from typing import Dict, List, Optional
-from .base_scraper import BaseScraper, Product, clean_price, normalize_specs, normalize_spec_name, is_junior_racket
+from typing import Dict, Optional
+from .base_scraper import HTTPStatusError, Product, clean_price, normalize_specs, normalize_spec_name
+from .shopify_scraper import SHOPIFY_API_HEADERS, ShopifyScraper
 
-def _ssl_ctx() -> ssl.SSLContext:
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    return ctx
-
-class PadelProShopScraper(BaseScraper):
+class PadelProShopScraper(ShopifyScraper):
     """Scraper for PadelProShop online store.
     
     Uses the Shopify JSON API for both category and product scraping,
     eliminating the need for Playwright browser automation entirely.
     """
 
-    def _fetch_api_page(self, collection_path: str, page_num: int) -> list:
-        """Fetch a single page of products from the Shopify JSON API (sync)."""
-        time.sleep(random.uniform(2.0, 4.0))
-        api_url = f"https://padelproshop.com{collection_path}/products.json?limit=250&page={page_num}"
-        req = urllib.request.Request(api_url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json',
-        })
+    rate_limit = 0.3
+    rate_burst = 1
+    rate_jitter = (0.0, 1.0)
+
+    shop_domain = 'padelproshop.com'
+    log_name = 'PadelProShop'
+    default_collection_path = '/collections/palas-padel'
+
+    async def _fetch_api_page(self, collection_path: str, page_num: int) -> list:
+        """Fetch a single page of products from the Shopify JSON API."""
+        api_url = f"https://{self.shop_domain}{collection_path}/products.json?limit=250&page={page_num}"
         for attempt in range(3):
             try:
-                with urllib.request.urlopen(req, timeout=30, context=_ssl_ctx()) as resp:
-                    data = json.loads(resp.read().decode('utf-8'))
+                data = await self.fetch_json(api_url, headers=SHOPIFY_API_HEADERS)
                 return data.get('products', [])
-            except urllib.error.HTTPError as e:
-                if e.code == 403 and attempt < 2:
+            except HTTPStatusError as e:
+                if e.status == 403 and attempt < 2:
                     wait = 30 * (attempt + 1)
                     print(f"[PadelProShop] 403 on category page {page_num}, retrying in {wait}s...")
-                    time.sleep(wait)
+                    self.throttle(api_url, wait)
                     continue
                 raise
         return []
 
-    def _fetch_product_json(self, handle: str) -> dict:
-        """Fetch a single product's full data from the Shopify JSON API (sync)."""
-        time.sleep(random.uniform(3.0, 5.0))
+    async def _fetch_product_json(self, handle: str) -> dict:
+        """Fetch a single product's full data from the Shopify JSON API."""
         api_url = f"https://padelproshop.com/products/{handle}.json"
-        req = urllib.request.Request(api_url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json',
-        })
         for attempt in range(3):
             try:
-                with urllib.request.urlopen(req, timeout=30, context=_ssl_ctx()) as resp:
-                    data = json.loads(resp.read().decode('utf-8'))
+                data = await self.fetch_json(api_url, headers=SHOPIFY_API_HEADERS)
                 return data.get('product', {})
-            except urllib.error.HTTPError as e:
-                if e.code == 403 and attempt < 2:
+            except HTTPStatusError as e:
+                if e.status == 403 and attempt < 2:
                     wait = 30 * (attempt + 1)
                     print(f"[PadelProShop] 403 on {handle}, retrying in {wait}s...")
-                    time.sleep(wait)
+                    self.throttle(api_url, wait)
                     continue
                 raise
         return {}
@@ -149,87 +133,20 @@ class PadelProShopScraper(BaseScraper):
 
         return specs
 
-    async def scrape_product(self, url: str) -> Optional[Product]:
-        """Scrape product data from PadelProShop using Shopify JSON API only."""
-        
-        # Extract handle from URL: /products/pala-xyz -> pala-xyz
-        handle = url.rstrip('/').split('/products/')[-1].split('?')[0]
-        if not handle:
-            return None
-        
-        try:
-            loop = asyncio.get_event_loop()
-            product_data = await loop.run_in_executor(
-                None, self._fetch_product_json, handle
-            )
-        except Exception as e:
-            print(f"[PadelProShop] API error for {handle}: {e}")
-            return None
-
-        if not product_data:
-            return None
-        if not isinstance(product_data, dict):
-            return None
-        
-        # Name
-        name = product_data.get('title')
-        if not name:
-            return None
-        if is_junior_racket(name):
-            print(f"[PadelProShop] Skipping junior racket: {name}")
-            return None
-
-        # Price
-        variants = product_data.get('variants') if isinstance(product_data.get('variants'), list) else []
-        first_variant = variants[0] if variants and isinstance(variants[0], dict) else {}
-
-        price = 0.0
-        if first_variant:
-            try:
-                price = float(first_variant.get('price'))
-            except (ValueError, TypeError):
-                pass
-
-        # Original Price
-        original_price = None
-        if first_variant:
-            try:
-                op = first_variant.get('compare_at_price')
-                if op:
-                    original_price = float(op)
-            except (ValueError, TypeError, AttributeError):
-                pass
-
-        # Brand
-        brand = product_data.get('vendor') or 'Unknown'
-
-        # Images
-        images = []
-        raw_images = product_data.get('images')
-        if isinstance(raw_images, list):
-            for img in raw_images:
-                src = img.get('src') if isinstance(img, dict) else img
-                if src:
-                    images.append(src)
-        
-        image = images[0] if images else ''
-
-        # Specs from body_html
-        specs = self._parse_specs_from_html(product_data.get('body_html', ''))
+    async def _complete_specs(self, product: Product, product_data: dict) -> Product:
+        """Fill a missing Forma (full HTML page, then tags) and normalize specs."""
+        specs = product.specs
 
         # Si no se encontró Forma en el JSON (body_html), intentamos descargar el HTML completo
         if 'Forma' not in specs:
             try:
-                loop = asyncio.get_event_loop()
-                req = urllib.request.Request(url, headers={'User-Agent': self.user_agent})
-                with urllib.request.urlopen(req, timeout=15, context=_ssl_ctx()) as resp:
-                    full_html = resp.read().decode('utf-8')
-                
+                full_html = await self.fetch_text(product.url, timeout=15)
+
                 # Parse metadata/theme specific specs from HTML
                 more_specs = self._parse_specs_from_html(full_html)
                 specs.update(more_specs)
             except Exception as e:
-                print(f"[PadelProShop] Error fetching HTML fallback for {handle}: {e}")
+                print(f"[PadelProShop] Error fetching HTML fallback for {product.url}: {e}")
 
         # Si aún no hay Forma, intentar desde los tags
         if 'Forma' not in specs:
@@ -243,68 +160,5 @@ class PadelProShopScraper(BaseScraper):
             if shape_from_tags:
                 specs['Forma'] = shape_from_tags
 
-        specs = normalize_specs(specs)
-
-        return Product(
-            url=url,
-            name=name,
-            price=price,
-            original_price=original_price,
-            brand=brand,
-            image=image,
-            images=images,
-            specs=specs
-        )
-
-    async def scrape_category(self, url: str) -> List[str]:
-        """Scrape product URLs using the Shopify products.json API.
-        
-        Uses the public Shopify JSON API instead of Playwright-based
-        infinite scroll, which was unreliable.
-        """
-        
-        # Determine the collection path from the URL
-        if '/collections/' in url:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            collection_path = parsed.path.rstrip('/')
-        else:
-            collection_path = '/collections/palas-padel'
-        
-        product_urls = []
-        page_num = 1
-        
-        print(f"[PadelProShop] Using Shopify API for product discovery...")
-        
-        while True:
-            if page_num > 20:
-                print(f"[PadelProShop] Reached page limit (20). Stopping.")
-                break
-            
-            print(f"[PadelProShop] Fetching API page {page_num}...")
-            
-            try:
-                loop = asyncio.get_event_loop()
-                products = await loop.run_in_executor(
-                    None, self._fetch_api_page, collection_path, page_num
-                )
-            except Exception as e:
-                print(f"[PadelProShop] API error on page {page_num}: {e}")
-                break
-            
-            if not products:
-                print(f"[PadelProShop] No more products on page {page_num}. Done.")
-                break
-            
-            for product in products:
-                handle = product.get('handle')
-                if handle:
-                    product_url = f"https://padelproshop.com/products/{handle}"
-                    if product_url not in product_urls:
-                        product_urls.append(product_url)
-            
-            print(f"[PadelProShop] Page {page_num}: {len(products)} products fetched. Total: {len(product_urls)}")
-            page_num += 1
-        
-        print(f"[PadelProShop] Final count: {len(product_urls)} products from API")
-        return product_urls
+        product.specs = normalize_specs(specs)
+        return product
@@ -1,21 +1,51 @@
+import copy
 import json
 import os
 import re
+import threading
 import unicodedata
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-from typing import Dict, List, Optional, Any
-from thefuzz import fuzz
+from typing import Dict, List, Optional, Any, FrozenSet, Set, Tuple
+from rapidfuzz import fuzz, process
+from thefuzz import utils as fuzz_utils
+from . import catalog_json
 from .paddle_normalizer import normalize_paddle_name, normalize_for_comparison, slugify_paddle
 
+class CatalogLoadError(Exception):
+    """Raised when rackets.json exists but cannot be parsed."""
+
+
 class RacketManager:
-    """Manages the centralized rackets database with rigorous deduplication."""
+    """Manages the centralized rackets database with rigorous deduplication.
+
+    Merges are serialized by an internal lock, so merge_product/merge_products
+    can be called from several threads or store workers at once.
 
-    def __init__(self, db_path: str = "rackets.json"):
+    Modified entries are tracked as dirty; save_db() skips the write when
+    nothing changed and otherwise replaces rackets.json atomically.
+    """
+
+    # Blocks larger than this are narrowed with the token index before scoring
+    PRESELECT_MIN_BLOCK = 32
+
+    def __init__(self, db_path: str = "rackets.json", check_url_map: bool = False,
+                 compact: bool = False):
         self.db_path = db_path
+        # compact=True writes rackets.json without indentation
+        self.compact = compact
+        self._dirty: Set[str] = set()
+        # When set, save_db() verifies the incrementally maintained url_map
+        # against a full rebuild (and repairs it).
+        self.check_url_map = check_url_map
+        self._lock = threading.RLock()
         self.data: Dict[str, Any] = self._load_db()
         self._sanitize_loaded_data()
         self.url_map: Dict[str, str] = self._build_url_map()
+        self._build_price_index()
+        # The matching index is only needed to merge products; build it lazily
+        # so price-only runs don't pay for fingerprinting the whole catalog.
+        self._index_ready = False
 
     def _coerce_specs(self, raw_specs: Any) -> Dict[str, str]:
         """Normalize specs to dict format (legacy DB can store JSON strings)."""
@@ -82,10 +112,10 @@ class RacketManager:
     def _load_db(self) -> Dict[str, Any]:
         if os.path.exists(self.db_path):
             try:
-                with open(self.db_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {}
+                return catalog_json.load(self.db_path)
+            except json.JSONDecodeError as e:
+                # Never fall back to an empty catalog: the next save would wipe it
+                raise CatalogLoadError(f"Cannot parse {self.db_path}: {e}") from e
         return {}
     
     def _build_url_map(self) -> Dict[str, str]:
@@ -98,10 +128,87 @@ class RacketManager:
                      mapping[price_entry["url"]] = slug
         return mapping
 
-    def save_db(self):
-        with open(self.db_path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
-        self.url_map = self._build_url_map()
+    # =========================================================================
+    # STORE PRICES
+    # =========================================================================
+    # rackets.json keeps each racket's prices as a list (its stable serialized
+    # form, in insertion order); this index points at the same entry dicts by
+    # store so lookups and updates don't scan the list.
+
+    def _build_price_index(self):
+        self._price_index: Dict[str, Dict[str, dict]] = {}
+        for slug, racket in self.data.items():
+            by_store: Dict[str, dict] = {}
+            for entry in racket.get("prices", []):
+                by_store.setdefault(entry.get("store"), entry)
+            self._price_index[slug] = by_store
+
+    def prices_by_store(self, slug: str) -> Dict[str, dict]:
+        """Price entries of a racket keyed by store (live entries, not copies)."""
+        return self._price_index.get(slug, {})
+
+    def get_price(self, slug: str, store: str) -> Optional[dict]:
+        return self._price_index.get(slug, {}).get(store)
+
+    def set_price(self, slug: str, store: str, **fields) -> dict:
+        """Update the store's price entry of a racket, creating it if missing.
+
+        A new "url" is mapped to this racket in url_map (taking it over if it
+        pointed to another one) and the entry's previous URL is released.
+        """
+        with self._lock:
+            entry = self.get_price(slug, store)
+            if entry is None:
+                entry = {"store": store}
+                self.data[slug].setdefault("prices", []).append(entry)
+                self._price_index.setdefault(slug, {})[store] = entry
+            old_url = entry.get("url")
+            if any(entry.get(k, object()) != v for k, v in fields.items()):
+                entry.update(fields)
+                self._dirty.add(slug)
+            new_url = entry.get("url")
+            if old_url != new_url and old_url and self.url_map.get(old_url) == slug:
+                del self.url_map[old_url]
+            if new_url:
+                self.url_map[new_url] = slug
+            return entry
+
+    def verify_url_map(self) -> List[str]:
+        """URLs where url_map disagrees with a full rebuild from the catalog."""
+        expected = self._build_url_map()
+        return [url for url in expected.keys() | self.url_map.keys()
+                if expected.get(url) != self.url_map.get(url)]
+
+    def mark_dirty(self, slug: str):
+        """Flag an entry edited outside RacketManager's methods for the next save."""
+        with self._lock:
+            self._dirty.add(slug)
+
+    @property
+    def dirty(self) -> Set[str]:
+        return set(self._dirty)
+
+    def save_db(self, force: bool = False) -> bool:
+        """Write rackets.json if any entry changed (or force=True).
+
+        Returns True if the file was written.
+        """
+        with self._lock:
+            if not self._dirty and not force and os.path.exists(self.db_path):
+                return False
+            catalog_json.dump(self.data, self.db_path, self.compact)
+            self._dirty.clear()
+            if self.check_url_map:
+                mismatched = self.verify_url_map()
+                if mismatched:
+                    print(f"⚠️  url_map out of sync for {len(mismatched)} URLs, rebuilding.")
+                    self.url_map = self._build_url_map()
+            return True
+
+    def snapshot(self, slugs: List[str]) -> Dict[str, Any]:
+        """Deep copies of the given entries, consistent with concurrent merges."""
+        with self._lock:
+            return {slug: copy.deepcopy(self.data[slug]) for slug in slugs if slug in self.data}
 
     def _slugify(self, text: str) -> str:
         """Delegado en paddle_normalizer.slugify_paddle para consistencia."""
@@ -182,9 +289,189 @@ class RacketManager:
         return {
             "year": year,
             "suffixes": found_suffixes,
-            "clean_name": clean_name
+            "clean_name": clean_name,
+            # Same preprocessing thefuzz applies before scoring
+            "match_name": fuzz_utils.full_process(clean_name, force_ascii=True),
         }
 
+    # =========================================================================
+    # BLOCKING INDEX
+    # =========================================================================
+    # Catalog entries are grouped by (brand, suffixes) and then by year, with
+    # their features computed once on insert. Two models can only be merged
+    # when brand and suffixes match and years don't conflict, so a merge only
+    # has to fuzz against one block instead of the whole catalog.
+    #
+    # The cached features remember the model they were computed from. Renames
+    # should go through update_model(), which re-fingerprints the entry and
+    # moves it to its new block; an entry whose 'model' was edited directly is
+    # caught the next time its block is looked up. Either way fingerprints are
+    # computed once per model string, never on every comparison.
+    #
+    # A token index (token -> slugs) picks, in large blocks, the entries that
+    # share a rare token with the incoming name. They are scored first, in one
+    # batched rapidfuzz call; the rest of the block is then scored with the
+    # cutoff raised to what it would take to beat that best match, so the
+    # result is the same as scoring the whole block.
+    #
+    # Every entry keeps its catalog insertion order (_seq): candidates are
+    # visited in that order and ties go to the oldest entry, as in a linear
+    # scan of self.data.
+
+    def _index_brand(self, racket: dict) -> str:
+        brand = racket.get('brand', 'Unknown')
+        # Fix for existing bad data in DB (e.g. "Unknown" in DB but real brand now)
+        if brand == "Unknown":
+            brand = self._detect_brand_from_name(racket.get('model', ''))
+        return str(brand).lower()
+
+    def _build_index(self):
+        self._features: Dict[str, dict] = {}
+        self._block_of: Dict[str, Tuple[str, FrozenSet[str]]] = {}
+        self._blocks: Dict[Tuple[str, FrozenSet[str]], Dict[Optional[str], Dict[str, None]]] = {}
+        self._tokens: Dict[str, Dict[str, None]] = {}
+        self._seq: Dict[str, int] = {}
+        for slug in self.data:
+            self._index_add(slug)
+        self._index_ready = True
+
+    def _index_add(self, slug: str):
+        racket = self.data[slug]
+        self._seq.setdefault(slug, len(self._seq))
+        model = racket.get('model', '')
+        if not isinstance(model, str) or not model:
+            return
+        features = self._extract_features(model)
+        features['model'] = model
+        key = (self._index_brand(racket), frozenset(features['suffixes']))
+        self._features[slug] = features
+        self._block_of[slug] = key
+        self._blocks.setdefault(key, {}).setdefault(features['year'], {})[slug] = None
+        for token in set(features['match_name'].split()):
+            self._tokens.setdefault(token, {})[slug] = None
+
+    def _index_remove(self, slug: str):
+        key = self._block_of.pop(slug, None)
+        features = self._features.pop(slug, None)
+        if key is None:
+            return
+        years = self._blocks[key]
+        bucket = years[features['year']]
+        bucket.pop(slug, None)
+        if not bucket:
+            del years[features['year']]
+        if not years:
+            del self._blocks[key]
+        for token in set(features['match_name'].split()):
+            postings = self._tokens.get(token)
+            if postings is not None:
+                postings.pop(slug, None)
+                if not postings:
+                    del self._tokens[token]
+
+    def _reindex(self, slug: str):
+        if not self._index_ready:
+            return
+        self._index_remove(slug)
+        self._index_add(slug)
+
+    def _is_stale(self, slug: str) -> bool:
+        return self._features[slug]['model'] != self.data[slug].get('model')
+
+    def _fingerprint(self, slug: str) -> Optional[dict]:
+        """Cached features of a catalog entry, recomputed only if its model changed."""
+        if slug not in self._features or self._is_stale(slug):
+            self._reindex(slug)
+        return self._features.get(slug)
+
+    def update_model(self, slug: str, model: str):
+        """Rename a catalog entry, keeping its cached fingerprint in sync."""
+        self.data[slug]['model'] = model
+        self._dirty.add(slug)
+        self._reindex(slug)
+
+    def _candidates(self, brand: str, features: dict) -> List[str]:
+        """Slugs with the same brand and suffixes and a non-conflicting year,
+        in catalog order."""
+        years = self._blocks.get((brand.lower(), frozenset(features['suffixes'])))
+        if not years:
+            return []
+        if features['year'] is None:
+            slugs = [slug for bucket in years.values() for slug in bucket]
+        else:
+            slugs = list(years.get(features['year'], ())) + list(years.get(None, ()))
+        stale = [slug for slug in slugs if self._is_stale(slug)]
+        if stale:
+            for slug in stale:
+                self._reindex(slug)
+            return self._candidates(brand, features)
+        return sorted(slugs, key=self._seq.__getitem__)
+
+    def _preselect(self, candidates: List[str], features: dict) -> List[str]:
+        """Keep the candidates sharing a rare token with the incoming name.
+
+        Tokens present in more than 5% of the catalog (brand names, "pro",
+        "carbon"...) only count when the name has no rarer token.
+        """
+        postings = [self._tokens[t] for t in set(features['match_name'].split()) if t in self._tokens]
+        if not postings:
+            return candidates
+        rare_limit = max(50, len(self._features) // 20)
+        rare = [p for p in postings if len(p) <= rare_limit] or postings
+        return [slug for slug in candidates if any(slug in p for p in rare)]
+
+    def _score(self, candidates: List[str], features: dict, cutoff: float) -> List[Tuple[int, str]]:
+        """(score, slug) of the candidates whose raw score reaches `cutoff`.
+
+        Scores are token sort ratios rounded like thefuzz's, +5 for the same year.
+        """
+        year = features['year']
+        matches = process.extract(
+            features['match_name'],
+            [self._features[s]['match_name'] for s in candidates],
+            scorer=fuzz.token_sort_ratio,
+            limit=None,
+            score_cutoff=cutoff,
+        )
+        scored = []
+        for _, raw_score, idx in matches:
+            slug = candidates[idx]
+            score = int(round(raw_score))
+            if year and year == self._features[slug]['year']:
+                score += 5
+            scored.append((score, slug))
+        return scored
+
+    def _best_match(self, candidates: List[str], features: dict) -> Optional[str]:
+        """Best candidate scoring > 88 (token sort ratio, +5 for the same year).
+
+        Ties go to the candidate added to the catalog first. In blocks larger
+        than PRESELECT_MIN_BLOCK the candidates sharing a rare token are scored
+        first; the others only need scoring from the raw score that could
+        still match or beat the best one found.
+        """
+        candidates = [s for s in candidates if self._are_compatible(features, self._features[s])]
+        if not candidates:
+            return None
+
+        year = features['year']
+        # With the +5 bonus a same-year candidate passes from a raw 83.5 upwards
+        cutoff = 83.5 if year else 88.5
+        scored: List[Tuple[int, str]] = []
+        if len(candidates) > self.PRESELECT_MIN_BLOCK:
+            preselected = self._preselect(candidates, features)
+            scored = [m for m in self._score(preselected, features, cutoff) if m[0] > 88]
+            if scored:
+                # A later candidate must tie the best score to matter
+                best_score = max(score for score, _ in scored)
+                cutoff = max(cutoff, best_score - (5 if year else 0) - 0.5)
+            chosen = set(preselected)
+            candidates = [s for s in candidates if s not in chosen]
+        scored += [m for m in self._score(candidates, features, cutoff) if m[0] > 88]
+        if not scored:
+            return None
+        return min(scored, key=lambda m: (-m[0], self._seq[m[1]]))[1]
+
     def _are_compatible(self, f_a: dict, f_b: dict) -> bool:
         # Conflict 1: Years
         if f_a['year'] and f_b['year'] and f_a['year'] != f_b['year']:
@@ -198,8 +485,9 @@ class RacketManager:
 
         return True
 
-    def merge_product(self, product: Any, store_name: str):
-        """Merge product with rigorous checks and auto-correction."""
+    def _prepare_product(self, product: Any) -> Optional[dict]:
+        """Lock-free part of a merge: name normalization, brand rescue, pack filter
+        and fingerprint. Returns None for products that must not be merged."""
         p_dict = product.model_dump() if hasattr(product, 'model_dump') else product.to_dict()
         p_name_raw = p_dict.get('name', '')
         # ── NORMALIZACIÓN EN IMPORT TIME ──────────────────────────────────────
@@ -223,7 +511,39 @@ class RacketManager:
         # 1. STRICT FILTER: Exclude Packs
         forbidden = ['pack', 'duo', 'conjunto', 'oferta', '+', 'mochila', 'paletero', 'zapatillas']
         if any(term in p_name.lower() for term in forbidden):
-            return
+            return None
+
+        # Fingerprint up front unless the URL is already known (checked again under the lock)
+        features = None if p_url in self.url_map else self._extract_features(p_name)
+        return {"dict": p_dict, "name": p_name, "brand": p_brand, "url": p_url, "features": features}
+
+    def merge_product(self, product: Any, store_name: str):
+        """Merge product with rigorous checks and auto-correction."""
+        prepared = self._prepare_product(product)
+        if prepared is None:
+            return None
+        with self._lock:
+            return self._merge_prepared(prepared, store_name)
+
+    def merge_products(self, products: List[Any], store_name: str) -> List[Optional[str]]:
+        """Merge a batch of products from one store.
+
+        Normalization and fingerprinting run before the lock is taken, which is
+        then held once for the whole batch. Returns the slug of each product
+        (None for filtered ones), in order.
+        """
+        prepared = [self._prepare_product(product) for product in products]
+        with self._lock:
+            return [self._merge_prepared(p, store_name) if p else None for p in prepared]
+
+    def _merge_prepared(self, prepared: dict, store_name: str) -> str:
+        p_dict = prepared["dict"]
+        p_name = prepared["name"]
+        p_brand = prepared["brand"]
+        p_url = prepared["url"]
+
+        if not self._index_ready:
+            self._build_index()
 
         slug = None
         
@@ -233,45 +553,10 @@ class RacketManager:
         
         # 3. Hybrid Fingerprint Match
         if not slug:
-            input_features = self._extract_features(p_name)
-            best_score = 0
-            best_match_slug = None
-            
-            for existing_slug, data in self.data.items():
-                if not isinstance(data, dict):
-                    continue
-                # Filter A: Brand must match (normalized)
-                existing_brand = data.get('brand', 'Unknown')
-                
-                # Fix for existing bad data in DB (e.g. "Unknown" in DB but real brand now)
-                if existing_brand == "Unknown":
-                    existing_brand = self._detect_brand_from_name(data['model'])
-                
-                if existing_brand.lower() != p_brand.lower():
-                    continue
-                
-                existing_model = data.get('model', '')
-                if not isinstance(existing_model, str) or not existing_model:
-                    continue
-
-                existing_features = self._extract_features(existing_model)
-
-                # Filter B: Hard Compatibility
-                if not self._are_compatible(input_features, existing_features):
-                    continue
-
-                # Filter C: Fuzzy Match
-                score = fuzz.token_sort_ratio(input_features['clean_name'], existing_features['clean_name'])
-                
-                if input_features['year'] and input_features['year'] == existing_features['year']:
-                    score += 5
-
-                # Threshold
-                if score > 88:
-                    if score > best_score:
-                        best_score = score
-                        best_match_slug = existing_slug
-            
+            input_features = prepared["features"] or self._extract_features(p_name)
+            # Filter A: Brand, B: Hard Compatibility (blocking index), C: Fuzzy Match
+            best_match_slug = self._best_match(self._candidates(p_brand, input_features), input_features)
+
             if best_match_slug:
                 slug = best_match_slug
                 # Update Master Model Name if incoming is cleaner (heuristic: shorter is usually cleaner for masters)
@@ -279,9 +564,9 @@ class RacketManager:
                 existing_entry = self.data[slug]
 
                 # Logic: If current has no year, but new one does, take new name.
-                existing_feats = self._extract_features(existing_entry['model'])
+                existing_feats = self._fingerprint(slug)
                 if not existing_feats['year'] and input_features['year']:
-                     existing_entry['model'] = p_name
+                     self.update_model(slug, p_name)
                 # Logic: If both have year (or neither), prefer the one WITHOUT player name (cleaner)
                 elif len(p_name) < len(existing_entry['model']):
                      # Simple heuristic: shorter often means less marketing fluff
@@ -315,9 +600,9 @@ class RacketManager:
                     "images": [],
                     "prices": []
                 }
+                self._index_add(slug)
         
         racket_entry = self.data[slug]
-        self.url_map[p_url] = slug
 
         # Legacy safeguard: old records may still contain specs as serialized JSON string.
         racket_entry["specs"] = self._coerce_specs(racket_entry.get("specs"))
@@ -325,6 +610,7 @@ class RacketManager:
         # Force Brand update if it was Unknown before
         if racket_entry.get('brand') == "Unknown" and p_brand != "Unknown":
             racket_entry['brand'] = p_brand
+            self._reindex(slug)
 
         # 5. Merge Specs
         for key, value in p_dict.get('specs', {}).items():
@@ -353,24 +639,22 @@ class RacketManager:
                 current_imgs.add(opt_img)
 
         # 7. Update Price
-        store_entry = next((item for item in racket_entry["prices"] if item["store"] == store_name), None)
         now = datetime.now().isoformat()
-        
-        if store_entry:
-            store_entry["price"] = p_dict.get('price')
-            store_entry["url"] = p_url
-            store_entry["last_updated"] = now
+        if self.get_price(slug, store_name):
+            fields = {"price": p_dict.get('price'), "url": p_url, "last_updated": now}
             if p_dict.get('original_price'):
-                 store_entry["original_price"] = p_dict.get('original_price')
+                fields["original_price"] = p_dict.get('original_price')
         else:
-            racket_entry["prices"].append({
-                "store": store_name,
+            fields = {
                 "price": p_dict.get('price'),
                 "original_price": p_dict.get('original_price'),
                 "url": p_url,
                 "currency": "EUR",
-                "last_updated": now
-            })
+                "last_updated": now,
+            }
+        self.set_price(slug, store_name, **fields)
+
+        self._dirty.add(slug)
 
         # NOT calling save_db() here - it's called externally after batch processing
         return slug
\ No newline at end of file
@@ -0,0 +1,214 @@
+from abc import abstractmethod
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from .base_scraper import BaseScraper, Product, is_junior_racket
+
+SHOPIFY_API_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+}
+
+
+class ShopifyScraper(BaseScraper):
+    """Shared catalog code for stores running on Shopify.
+
+    Products are read from the public JSON API: a collection's products.json
+    pages for discovery, bulk catalogs and price feeds, and
+    /products/{handle}.json for single products. Subclasses set the store's
+    domain and log name, and provide _fetch_product_json, the spec parsing
+    and _complete_specs.
+    """
+
+    supports_bulk_catalog = True
+    supports_price_feed = True
+
+    # e.g. "padelmarket.com"
+    shop_domain: str = ''
+    # Prefix of the store's log lines, e.g. "PadelMarket"
+    log_name: str = 'Shopify'
+    # Path of product pages and the collection scraped when the URL has none
+    product_path: str = '/products'
+    default_collection_path: str = '/collections/all'
+
+    @abstractmethod
+    async def _fetch_product_json(self, handle: str) -> dict:
+        """Full data of one product from /products/{handle}.json."""
+
+    @abstractmethod
+    def _parse_specs_from_html(self, html: str) -> Dict[str, str]:
+        """Specs found in a product's body_html or full page HTML."""
+
+    async def _fetch_api_page(self, collection_path: str, page_num: int) -> list:
+        """Fetch a single page of products from the Shopify JSON API."""
+        api_url = f"https://{self.shop_domain}{collection_path}/products.json?limit=250&page={page_num}"
+        data = await self.fetch_json(api_url, headers=SHOPIFY_API_HEADERS)
+        return data.get('products', [])
+
+    def _collection_path(self, url: str) -> str:
+        # e.g. https://padelmarket.com/es-eu/collections/palas -> /es-eu/collections/palas
+        if '/collections/' in url:
+            return urlparse(url).path.rstrip('/')
+        return self.default_collection_path
+
+    @staticmethod
+    def _handle_from_url(url: str) -> str:
+        # /products/pala-xyz -> pala-xyz
+        return url.rstrip('/').split('/products/')[-1].split('?')[0]
+
+    def _product_url(self, handle: str) -> str:
+        return f"https://{self.shop_domain}{self.product_path}/{handle}"
+
+    def _build_product(self, product_data: dict, url: str, quiet: bool = False) -> Optional[Product]:
+        """Build a Product from Shopify product JSON (specs from body_html only).
+
+        Works both with /products/{handle}.json and with the entries of a
+        collection's products.json page, which share the same schema.
+        quiet=True skips junior rackets without logging each one.
+        """
+        if not product_data or not isinstance(product_data, dict):
+            return None
+
+        # Name
+        name = product_data.get('title')
+        if not name:
+            return None
+        if is_junior_racket(name):
+            if not quiet:
+                print(f"[{self.log_name}] Skipping junior racket: {name}")
+            return None
+
+        # Price
+        variants = product_data.get('variants') if isinstance(product_data.get('variants'), list) else []
+        first_variant = variants[0] if variants and isinstance(variants[0], dict) else {}
+
+        price = 0.0
+        if first_variant:
+            try:
+                price = float(first_variant.get('price'))
+            except (ValueError, TypeError):
+                pass
+
+        # Original Price
+        original_price = None
+        if first_variant:
+            try:
+                op = first_variant.get('compare_at_price')
+                if op:
+                    original_price = float(op)
+            except (ValueError, TypeError, AttributeError):
+                pass
+
+        # Brand
+        brand = product_data.get('vendor') or 'Unknown'
+
+        # Images
+        images = []
+        raw_images = product_data.get('images')
+        if isinstance(raw_images, list):
+            for img in raw_images:
+                src = img.get('src') if isinstance(img, dict) else img
+                if src:
+                    images.append(src)
+
+        image = images[0] if images else ''
+
+        # Specs from body_html
+        specs = self._parse_specs_from_html(product_data.get('body_html', ''))
+
+        return Product(
+            url=url,
+            name=name,
+            price=price,
+            original_price=original_price,
+            brand=brand,
+            image=image,
+            images=images,
+            specs=specs
+        )
+
+    async def scrape_product(self, url: str) -> Optional[Product]:
+        """Scrape product data using the Shopify JSON API."""
+        handle = self._handle_from_url(url)
+        if not handle:
+            return None
+
+        try:
+            product_data = await self._fetch_product_json(handle)
+        except Exception as e:
+            print(f"[{self.log_name}] API error for {handle}: {e}")
+            return None
+
+        product = self._build_product(product_data, url)
+        if not product:
+            return None
+        return await self._complete_specs(product, product_data)
+
+    async def _fetch_collection(self, collection_path: str) -> List[dict]:
+        """Fetch the collection's products.json pages (in parallel windows) as raw product dicts."""
+        print(f"[{self.log_name}] Fetching API pages of {collection_path}...")
+
+        async def fetch_page(page_num: int) -> list:
+            return await self._fetch_api_page(collection_path, page_num)
+
+        products = await self.paginate(fetch_page, max_pages=20)
+        return [p for p in products if isinstance(p, dict)]
+
+    async def scrape_category(self, url: str) -> List[str]:
+        """Scrape product URLs using the Shopify products.json API."""
+        print(f"[{self.log_name}] Using Shopify API for product discovery...")
+        products = await self._fetch_collection(self._collection_path(url))
+
+        product_urls = []
+        for product in products:
+            handle = product.get('handle')
+            if handle:
+                product_url = self._product_url(handle)
+                if product_url not in product_urls:
+                    product_urls.append(product_url)
+
+        print(f"[{self.log_name}] Final count: {len(product_urls)} products from API")
+        return product_urls
+
+    async def scrape_catalog(self, url: str, limit: Optional[int] = None,
+                             concurrency=None) -> List[Product]:
+        """Build Products straight from the collection's products.json pages.
+
+        Only products whose body_html lacks the Forma spec trigger an extra
+        request (the full HTML page), bounded by `concurrency`.
+        """
+        print(f"[{self.log_name}] Bulk catalog via Shopify products.json...")
+        raw_products = await self._fetch_collection(self._collection_path(url))
+
+        pending = []
+        seen = set()
+        for product_data in raw_products:
+            handle = product_data.get('handle')
+            if not handle:
+                continue
+            product_url = self._product_url(handle)
+            if product_url in seen:
+                continue
+            seen.add(product_url)
+            product = self._build_product(product_data, product_url)
+            if product:
+                pending.append((product, product_data))
+            if limit and len(pending) >= limit:
+                break
+
+        return await self.complete_products(pending, concurrency)
+
+    def price_feed_key(self, url: str) -> Optional[str]:
+        return self._handle_from_url(url) or None
+
+    async def fetch_price_feed(self, url: str, known_urls: Optional[List[str]] = None) -> Dict[str, Product]:
+        """Price every product of the collection from its products.json pages."""
+        print(f"[{self.log_name}] Price feed via Shopify products.json...")
+        feed: Dict[str, Product] = {}
+        for product_data in await self._fetch_collection(self._collection_path(url)):
+            handle = product_data.get('handle')
+            if not handle or handle in feed:
+                continue
+            product = self._build_product(product_data, self._product_url(handle), quiet=True)
+            if product:
+                feed[handle] = product
+        return feed
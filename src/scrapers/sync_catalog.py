@@ -3,11 +3,15 @@
 sync_catalog.py — Script unificado de sincronización de catálogo para Smashly.
 
 Modos de ejecución:
-  --mode full     Scraping completo de catálogos (mensual, ~20-30min con concurrencia).
+  --mode full     Scraping completo de catálogos (mensual). Las tiendas se rascan
+                  en paralelo, cada una con su propio límite de concurrencia.
                   Descubre palas nuevas, actualiza precios y detecta palas
                   descatalogadas (sin aparición en ninguna tienda en >30 días).
 
-  --mode prices   Solo actualiza precios de URLs ya conocidas (semanal, ~10-15min).
+  --mode prices   Solo actualiza precios de URLs ya conocidas (semanal, ~1min).
+                  Las tiendas se leen en bloque (products.json en Shopify,
+                  GraphQL en PadelNuestro); solo se re-rascan las URLs que no
+                  aparecen en el feed.
                   Registra en price_history únicamente cuando el precio cambia.
                   Si una pala pierde todos sus precios, se marca como 'comparison_only'.
 
@@ -16,18 +20,26 @@ Uso:
   python -m src.scrapers.sync_catalog --mode prices
   python -m src.scrapers.sync_catalog --mode full --stores padelmarket,padelnuestro --limit 20 --dry-run
   python -m src.scrapers.sync_catalog --mode prices --stores padelproshop --dry-run
+  python -m src.scrapers.sync_catalog --mode full --adaptive --max-concurrency 12
+
+Benchmark offline (grabar una vez con red, reproducir después sin ella):
+  python -m src.scrapers.sync_catalog --mode full --dry-run --record /tmp/full.jsonl.gz
+  python -m src.scrapers.sync_catalog --mode full --dry-run --replay /tmp/full.jsonl.gz --replay-latency 0.05 0.2
 """
 
 import asyncio
 import argparse
+import hashlib
 import json
 import os
 import re
 import ssl
 import sys
+import threading
+import time
 import unicodedata
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 from supabase import create_client, Client
@@ -45,25 +57,61 @@ if __name__ == "__main__" and __package__ is None:
         sys.path.insert(0, project_root)
     __package__ = "src.scrapers"
 
+from .base_scraper import AdaptiveConcurrency, HTTPCache, ResponseArchive
 from .padelnuestro_scraper import PadelNuestroScraper
 from .padelproshop_scraper import PadelProShopScraper
 from .padelmarket_scraper import PadelMarketScraper
 from .racket_manager import RacketManager
+from . import catalog_json
 from .paddle_normalizer import normalize_paddle_name, slugify_paddle
 from .deduplicate_rackets import run as run_deduplication
 
 # ── Configuración ─────────────────────────────────────────────────────────────
 
+# (clase scraper, URL de categoría, overrides de los límites de peticiones por host)
+# Los límites por defecto de cada tienda son atributos de su scraper
+# (rate_limit = peticiones/segundo sostenidas, rate_burst = ráfaga máxima,
+# rate_jitter = retardo aleatorio extra (min, max) en segundos por petición);
+# aquí solo se ponen los que se quieran sobrescribir.
 STORE_CONFIGS = {
-    "padelmarket":  (PadelMarketScraper,  "https://padelmarket.com/collections/palas"),
-    "padelnuestro": (PadelNuestroScraper,  "https://www.padelnuestro.com/palas-padel"),
-    "padelproshop": (PadelProShopScraper,  "https://padelproshop.com/collections/palas-padel"),
+    "padelmarket":  (PadelMarketScraper,  "https://padelmarket.com/collections/palas", {}),
+    "padelnuestro": (PadelNuestroScraper,  "https://www.padelnuestro.com/palas-padel", {}),
+    "padelproshop": (PadelProShopScraper,  "https://padelproshop.com/collections/palas-padel", {}),
 }
 
+# Concurrencia por tienda: valor fijo por defecto, o punto de partida del
+# gobernador AIMD (--adaptive), que la ajusta entre 1 y MAX_ADAPTIVE_CONCURRENCY.
+FULL_CONCURRENCY = 2
+PRICES_CONCURRENCY = 5
+MAX_ADAPTIVE_CONCURRENCY = 16
+
+# Pipeline de full sync: tamaño de la cola de productos, lote de merge y
+# cada cuántos segundos se informa del throughput.
+PIPELINE_QUEUE_SIZE = 200
+PIPELINE_MERGE_BATCH = 50
+PIPELINE_REPORT_INTERVAL = 15
+
+# Filas por petición en los upserts en bloque de rackets a Supabase
+UPSERT_CHUNK_SIZE = 500
+
+# Filas por insert en bloque de price_history y reintentos de un lote fallido
+PRICE_HISTORY_BATCH = 500
+PRICE_HISTORY_RETRIES = 3
+
+# Ids por petición en los updates con filtro id IN (...) (van en la URL)
+ID_FILTER_CHUNK_SIZE = 200
+
 # Días sin aparecer en el catálogo de TODAS las tiendas para marcar como descatalogada
 DISCONTINUED_THRESHOLD_DAYS = 30
 
 RACKETS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rackets.json")
+# Último hash sincronizado de cada racket ({slug: {"id", "hash", "updated_at"}}),
+# para no reescribir en Supabase las filas que no han cambiado (se invalida si
+# la fila cambió en Supabase después, ver reconcile_sync_hashes)
+SYNC_HASHES_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "synced_hashes.json")
+
+# Caché HTTP condicional (ETag/Last-Modified) por defecto de --http-cache
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache")
 
 
 # ── Supabase init ──────────────────────────────────────────────────────────────
@@ -110,12 +158,34 @@ def now_utc() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def make_scraper(store: str, http_cache: Optional[HTTPCache] = None,
+                 archive: Optional[ResponseArchive] = None):
+    """Instancia el scraper de una tienda con los overrides de límites de STORE_CONFIGS."""
+    cls, _, rate_opts = STORE_CONFIGS[store]
+    return cls(**rate_opts, http_cache=http_cache, archive=archive)
+
+
+def make_concurrency_limiter(scraper, store: str, initial: int, adaptive: bool, max_concurrency: int):
+    """
+    Devuelve el limitador de concurrencia de una tienda: un Semaphore fijo o,
+    con adaptive=True, un gobernador AIMD enganchado al scraper para que reciba
+    las señales de 403/429/timeouts y latencia de cada respuesta.
+    """
+    if not adaptive:
+        return asyncio.Semaphore(initial)
+    scraper.concurrency = AdaptiveConcurrency(store, initial=initial, maximum=max_concurrency)
+    return scraper.concurrency
+
+
 # ── Supabase helpers ───────────────────────────────────────────────────────────
 
-def get_slug_id_map(client: Client) -> Dict[str, int]:
+def get_slug_id_map(client: Client, row_versions: Optional[Dict[int, str]] = None) -> Dict[str, int]:
     """
     Devuelve un dict {slug: numeric_id} de todos los rackets en Supabase.
     Maneja la paginación de 1000 en 1000.
+
+    Con row_versions, rellena además {numeric_id: updated_at} de cada fila,
+    que sirve para invalidar los hashes de synced_hashes.json.
     """
     mapping = {}
     page_size = 1000
@@ -125,12 +195,14 @@ def get_slug_id_map(client: Client) -> Dict[str, int]:
         start = current_page * page_size
         end = start + page_size - 1
         
-        result = client.table("rackets").select("id, slug").range(start, end).execute()
+        result = client.table("rackets").select("id, slug, updated_at").range(start, end).execute()
         rows = result.data or []
         
         for row in rows:
             if row.get("slug"):
                 mapping[row["slug"]] = row["id"]
+                if row_versions is not None:
+                    row_versions[row["id"]] = row.get("updated_at")
         
         if len(rows) < page_size:
             break
@@ -140,7 +212,8 @@ def get_slug_id_map(client: Client) -> Dict[str, int]:
     return mapping
 
 
-def ensure_slug_column_populated(client: Client, dry_run: bool = False) -> Dict[str, int]:
+def ensure_slug_column_populated(client: Client, dry_run: bool = False,
+                                 row_versions: Optional[Dict[int, str]] = None) -> Dict[str, int]:
     """
     Rellena la columna slug para los rackets que aún no la tienen,
     generando el slug a partir de los campos brand+model de Supabase.
@@ -148,6 +221,7 @@ def ensure_slug_column_populated(client: Client, dry_run: bool = False) -> Dict[
     Supabase es la fuente de verdad: el slug se construye desde los datos
     que ya están en la DB, sin depender del JSON local.
     Las colisiones se resuelven añadiendo el ID numérico como sufijo.
+    row_versions se pasa tal cual a get_slug_id_map.
     """
     all_rows = []
     page_size = 1000
@@ -165,7 +239,7 @@ def ensure_slug_column_populated(client: Client, dry_run: bool = False) -> Dict[
     rows_without_slug = [r for r in all_rows if not r.get("slug")]
 
     if not rows_without_slug:
-        return get_slug_id_map(client)
+        return get_slug_id_map(client, row_versions)
 
     print(f"📋 Poblando columna slug para {len(rows_without_slug)} rackets sin slug...")
 
@@ -201,14 +275,11 @@ def ensure_slug_column_populated(client: Client, dry_run: bool = False) -> Dict[
             updated += 1
 
     print(f"  ✅ Slugs populados: {updated} OK, {failed} errores.")
-    return get_slug_id_map(client)
+    return get_slug_id_map(client, row_versions)
 
 
-def upsert_racket(client: Client, slug: str, racket: dict, slug_id_map: Dict[str, int], dry_run: bool) -> Optional[int]:
-    """
-    Inserta o actualiza un racket en Supabase.
-    Devuelve el id numérico del racket en Supabase.
-    """
+def build_racket_payload(slug: str, racket: dict) -> dict:
+    """Fila de la tabla rackets de Supabase para un racket del catálogo local."""
     prices = racket.get("prices", [])
 
     # Construir el payload con los campos de precio por tienda
@@ -252,6 +323,16 @@ def upsert_racket(client: Client, slug: str, racket: dict, slug_id_map: Dict[str
     if has_any_price:
         payload["comparison_only"] = False
 
+    return payload
+
+
+def upsert_racket(client: Client, slug: str, racket: dict, slug_id_map: Dict[str, int], dry_run: bool) -> Optional[int]:
+    """
+    Inserta o actualiza un racket en Supabase.
+    Devuelve el id numérico del racket en Supabase.
+    """
+    payload = build_racket_payload(slug, racket)
+
     if dry_run:
         return slug_id_map.get(slug)
 
@@ -273,30 +354,253 @@ def upsert_racket(client: Client, slug: str, racket: dict, slug_id_map: Dict[str
     return None
 
 
-def record_price_history(
+def racket_payload_hash(payload: dict) -> str:
+    """Hash estable del contenido de una fila (sin las marcas de tiempo)."""
+    content = {k: v for k, v in payload.items() if k not in ("updated_at", "created_at", "id")}
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_sync_hashes() -> Dict[str, dict]:
+    """Hashes de la última sincronización con Supabase ({} si no hay o está dañado)."""
+    if not os.path.exists(SYNC_HASHES_JSON):
+        return {}
+    try:
+        with open(SYNC_HASHES_JSON, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        # Sin hashes simplemente se reescriben todas las filas
+        return {}
+
+
+def save_sync_hashes(hashes: Dict[str, dict]):
+    catalog_json.dump(hashes, SYNC_HASHES_JSON)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parsea un timestamptz de PostgREST ("...T10:00:00.12345+00:00", "...Z").
+    fromisoformat de Python 3.10 solo acepta 3 o 6 decimales, así que la
+    fracción se normaliza a microsegundos.
+    """
+    if not value:
+        return None
+    text = str(value).strip().replace(" ", "T", 1).replace("Z", "+00:00")
+    text = re.sub(r"\.(\d+)", lambda m: "." + m.group(1)[:6].ljust(6, "0"), text)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def reconcile_sync_hashes(
+    synced_hashes: Dict[str, dict],
+    slug_id_map: Dict[str, int],
+    row_versions: Dict[int, str],
+) -> int:
+    """
+    Descarta de synced_hashes las palas cuya fila en Supabase ya no es la que
+    escribimos: borradas o con otro id (p. ej. por la deduplicación), o con un
+    updated_at distinto del registrado (editadas desde el admin o por
+    deduplicate_rackets.py). Esas palas se vuelven a escribir completas.
+    Devuelve cuántos hashes se descartaron.
+    """
+    stale = []
+    for slug, last in synced_hashes.items():
+        db_id = slug_id_map.get(slug)
+        if db_id is None or not isinstance(last, dict) or last.get("id") != db_id:
+            stale.append(slug)
+            continue
+        written_at = _parse_timestamp(last.get("updated_at"))
+        if written_at is None or written_at != _parse_timestamp(row_versions.get(db_id)):
+            stale.append(slug)
+    for slug in stale:
+        del synced_hashes[slug]
+    return len(stale)
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def upsert_rackets_bulk(
     client: Client,
-    racket_db_id: int,
-    store: str,
-    price: float,
-    original_price: Optional[float],
-    discount_pct: int,
+    rackets: List[Tuple[str, dict]],
+    slug_id_map: Dict[str, int],
     dry_run: bool,
-):
-    """Inserta una fila en price_history. Solo llamar si el precio realmente cambió."""
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    synced_hashes: Optional[Dict[str, dict]] = None,
+    skipped: Optional[List[str]] = None,
+) -> Dict[str, int]:
+    """
+    Inserta o actualiza varios rackets en Supabase en peticiones de hasta
+    chunk_size filas. Las palas ya mapeadas en slug_id_map se actualizan con
+    un upsert sobre su id; las nuevas se insertan y sus ids se añaden a
+    slug_id_map. Devuelve {slug: id} de las palas escritas o sin cambios.
+
+    Con synced_hashes, las palas cuyo contenido (racket_payload_hash) coincide
+    con el último sincronizado para ese mismo id no se envían (se añaden a
+    skipped), y el hash de cada fila escrita se actualiza junto con el
+    updated_at que devuelve Supabase. synced_hashes debe haber pasado antes
+    por reconcile_sync_hashes para que las filas modificadas fuera de la
+    sincronización no se den por buenas.
+
+    PostgREST exige que todas las filas de una petición tengan las mismas
+    columnas, así que las filas se agrupan por columnas (según las tiendas con
+    precio) antes de trocearlas. Si un lote falla se reintenta fila a fila con
+    upsert_racket.
+    """
+    ids: Dict[str, int] = {}
     if dry_run:
-        print(f"    [dry-run] price_history: racket_id={racket_db_id} store={store} price={price}")
-        return
-    try:
-        client.table("price_history").insert({
-            "racket_id":           racket_db_id,
-            "store":               store,
-            "price":               price,
-            "original_price":      original_price,
-            "discount_percentage": discount_pct,
-            "recorded_at":         now_utc(),
-        }).execute()
-    except Exception as e:
-        print(f"    ❌ price_history insert error: {e}")
+        for slug, _ in rackets:
+            if slug in slug_id_map:
+                ids[slug] = slug_id_map[slug]
+        return ids
+
+    now = now_utc()
+    hashes: Dict[str, str] = {}
+    groups: Dict[Tuple[bool, frozenset], list] = {}
+    for slug, racket in dict(rackets).items():
+        row = build_racket_payload(slug, racket)
+        row["updated_at"] = now
+        is_new = slug not in slug_id_map
+        if synced_hashes is not None:
+            hashes[slug] = racket_payload_hash(row)
+            last = synced_hashes.get(slug)
+            if (not is_new and last and last.get("id") == slug_id_map[slug]
+                    and last.get("hash") == hashes[slug] and last.get("updated_at")):
+                ids[slug] = slug_id_map[slug]
+                if skipped is not None:
+                    skipped.append(slug)
+                continue
+        if is_new:
+            row["created_at"] = now
+        else:
+            row["id"] = slug_id_map[slug]
+        groups.setdefault((is_new, frozenset(row)), []).append((slug, racket, row))
+
+    # updated_at con el que quedó cada fila escrita en bloque; las que van
+    # por upsert_racket no lo tienen y se reescribirán en la siguiente pasada
+    written_at: Dict[str, str] = {}
+    for (is_new, _), group in groups.items():
+        for chunk in _chunks(group, chunk_size):
+            rows = [row for _, _, row in chunk]
+            try:
+                if is_new:
+                    result = client.table("rackets").insert(rows).execute()
+                    for row in result.data or []:
+                        slug_id_map[row["slug"]] = row["id"]
+                        ids[row["slug"]] = row["id"]
+                else:
+                    result = client.table("rackets").upsert(rows, on_conflict="id").execute()
+                    for row in rows:
+                        ids[row["slug"]] = row["id"]
+                for row in result.data or []:
+                    written_at[row["slug"]] = row.get("updated_at") or now
+            except Exception as e:
+                print(f"    ⚠️  Lote de {len(rows)} rackets rechazado ({e}); reintentando uno a uno...")
+                for slug, racket, _ in chunk:
+                    db_id = upsert_racket(client, slug, racket, slug_id_map, dry_run)
+                    if db_id:
+                        ids[slug] = db_id
+            if synced_hashes is not None:
+                for slug, _, _ in chunk:
+                    if slug in ids:
+                        synced_hashes[slug] = {
+                            "id": ids[slug], "hash": hashes[slug], "updated_at": written_at.get(slug),
+                        }
+    return ids
+
+
+class PriceHistoryBuffer:
+    """
+    Acumula filas de price_history y las inserta en bloque: cuando hay
+    batch_size filas pendientes y al final de cada etapa (flush()). Un lote
+    que falla se reintenta hasta `retries` veces con espera creciente; si
+    sigue fallando se descarta y se cuenta en `failed`.
+
+    Se puede usar desde varios hilos a la vez (el persist del full sync
+    escribe desde asyncio.to_thread). Con auto_flush=False add() solo encola
+    y nunca inserta: es lo que usa el modo prices, que llama a add() desde el
+    event loop y vacía el buffer al final en un hilo.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        dry_run: bool,
+        batch_size: int = PRICE_HISTORY_BATCH,
+        retries: int = PRICE_HISTORY_RETRIES,
+        auto_flush: bool = True,
+    ):
+        self.client = client
+        self.dry_run = dry_run
+        self.batch_size = max(1, batch_size)
+        self.retries = retries
+        self.auto_flush = auto_flush
+        self.inserted = 0
+        self.failed = 0
+        self.requests = 0
+        self._rows: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        racket_db_id: int,
+        store: str,
+        price: float,
+        original_price: Optional[float],
+        discount_pct: int,
+    ):
+        """Encola una fila. Solo llamar si el precio realmente cambió."""
+        if self.dry_run:
+            print(f"    [dry-run] price_history: racket_id={racket_db_id} store={store} price={price}")
+            return
+        with self._lock:
+            self._rows.append({
+                "racket_id":           racket_db_id,
+                "store":               store,
+                "price":               price,
+                "original_price":      original_price,
+                "discount_percentage": discount_pct,
+                "recorded_at":         now_utc(),
+            })
+            full = self.auto_flush and len(self._rows) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Inserta todas las filas pendientes."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        for chunk in _chunks(rows, self.batch_size):
+            self._insert(chunk)
+
+    def _insert(self, rows: List[dict]):
+        for attempt in range(self.retries + 1):
+            try:
+                self.client.table("price_history").insert(rows).execute()
+                with self._lock:
+                    self.requests += 1
+                    self.inserted += len(rows)
+                return
+            except Exception as e:
+                if attempt < self.retries:
+                    time.sleep(0.5 * 2 ** attempt)
+                    continue
+                print(f"    ❌ price_history: lote de {len(rows)} filas descartado "
+                      f"tras {attempt + 1} intentos: {e}")
+                with self._lock:
+                    self.failed += len(rows)
+
+    def summary(self) -> str:
+        line = f"{self.inserted} filas en {self.requests} inserts"
+        if self.failed:
+            line += f", {self.failed} descartadas"
+        return line
 
 
 def get_current_db_prices(client: Client) -> Dict[int, Dict[str, Optional[float]]]:
@@ -340,6 +644,11 @@ def mark_discontinued_rackets(
     Para cada tienda actualiza last_seen de las palas vistas.
     Marca como discontinued las que llevan >DISCONTINUED_THRESHOLD_DAYS sin aparecer en
     NINGUNA tienda (no elimina, solo pone discontinued=True).
+
+    Ambas escrituras son por conjuntos: un UPDATE ... WHERE id IN (...) por cada
+    ID_FILTER_CHUNK_SIZE palas, en lugar de uno por pala. Las candidatas se
+    filtran en Supabase y se leen paginadas; se marcan después de leerlas
+    todas para que las páginas no se desplacen.
     """
     now = now_utc()
     threshold = datetime.now(timezone.utc) - timedelta(days=DISCONTINUED_THRESHOLD_DAYS)
@@ -347,55 +656,54 @@ def mark_discontinued_rackets(
     # 1. Actualizar last_seen para las palas vistas en este scan
     for store, seen_slugs in seen_slugs_per_store.items():
         col = f"{store}_last_seen"
-        for slug in seen_slugs:
-            db_id = slug_id_map.get(slug)
-            if not db_id or dry_run:
-                continue
+        ids = sorted({slug_id_map[slug] for slug in seen_slugs if slug_id_map.get(slug)})
+        if not ids or dry_run:
+            continue
+        for chunk in _chunks(ids, ID_FILTER_CHUNK_SIZE):
             try:
-                client.table("rackets").update({col: now}).eq("id", db_id).execute()
+                client.table("rackets").update({col: now}).in_("id", chunk).execute()
             except Exception as e:
-                print(f"  ⚠️  last_seen update error for {slug}: {e}")
+                print(f"  ⚠️  last_seen update error ({store}, {len(chunk)} palas): {e}")
 
     if dry_run:
         print("  [dry-run] Skipping discontinued marking.")
         return
 
-    # 2. Buscar palas donde TODAS las last_seen sean None o anteriores al threshold
-    result = client.table("rackets").select(
-        "id, slug, discontinued,"
-        "padelnuestro_last_seen, padelmarket_last_seen, padelproshop_last_seen"
-    ).eq("discontinued", False).execute()
+    # 2. Buscar palas donde TODAS las last_seen sean None o anteriores al threshold.
+    # El filtro se evalúa en el servidor; las que nunca se han visto en ninguna
+    # tienda (todas None) no se marcan porque aún no han pasado por un full scan.
+    cutoff = threshold.strftime("%Y-%m-%dT%H:%M:%SZ")
+    last_seen_cols = [f"{store}_last_seen" for store in STORE_CONFIGS]
+    to_mark: List[dict] = []
+    page_size = 1000
+    current_page = 0
+
+    while True:
+        start = current_page * page_size
+        end = start + page_size - 1
+        query = client.table("rackets").select("id, slug").eq("discontinued", False)
+        for col in last_seen_cols:
+            query = query.or_(f"{col}.is.null,{col}.lt.{cutoff}")
+        query = query.or_(",".join(f"{col}.not.is.null" for col in last_seen_cols))
+        rows = query.order("id").range(start, end).execute().data or []
+        to_mark.extend(rows)
+
+        if len(rows) < page_size:
+            break
+        current_page += 1
 
     discontinued_count = 0
-    for row in result.data or []:
-        last_seens = [
-            row.get("padelnuestro_last_seen"),
-            row.get("padelmarket_last_seen"),
-            row.get("padelproshop_last_seen"),
-        ]
-        # Una pala se marca descatalogada solo si NUNCA ha sido vista o si todas sus
-        # fechas son anteriores al threshold
-        has_recent = False
-        for ls in last_seens:
-            if ls:
-                ls_dt = datetime.fromisoformat(ls.replace("Z", "+00:00"))
-                if ls_dt > threshold:
-                    has_recent = True
-                    break
-
-        # Si nunca se ha visto en ninguna tienda Y tiene más de X días de antigüedad
-        all_null = all(ls is None for ls in last_seens)
-        if all_null:
-            # Todavía no ha pasado por ningún full scan — no marcar aún
+    for chunk in _chunks(to_mark, ID_FILTER_CHUNK_SIZE):
+        try:
+            client.table("rackets").update({"discontinued": True}).in_(
+                "id", [row["id"] for row in chunk]
+            ).execute()
+        except Exception as e:
+            print(f"  ⚠️  Error marking discontinued ({len(chunk)} palas): {e}")
             continue
-
-        if not has_recent:
-            try:
-                client.table("rackets").update({"discontinued": True}).eq("id", row["id"]).execute()
-                discontinued_count += 1
-                print(f"  🗑️  Marcada como descatalogada: {row.get('slug') or row['id']}")
-            except Exception as e:
-                print(f"  ⚠️  Error marking discontinued {row['id']}: {e}")
+        discontinued_count += len(chunk)
+        for row in chunk:
+            print(f"  🗑️  Marcada como descatalogada: {row.get('slug') or row['id']}")
 
     if discontinued_count:
         print(f"\n  📊 {discontinued_count} palas marcadas como descatalogadas.")
@@ -403,16 +711,306 @@ def mark_discontinued_rackets(
         print("  ✅ Sin palas descatalogadas nuevas.")
 
 
+# ── Pipeline de full sync ──────────────────────────────────────────────────────
+
+class PipelineStats:
+    """Contadores por etapa del pipeline de full sync (fetch → merge → persist)."""
+
+    STAGES = ("fetch", "merge", "persist")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counts: Dict[str, int] = {stage: 0 for stage in self.STAGES}
+        self.errors: Dict[str, int] = {stage: 0 for stage in self.STAGES}
+
+    def line(self, queues: Dict[str, asyncio.Queue]) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        stages = " | ".join(
+            f"{stage}={self.counts[stage]} ({self.counts[stage] / elapsed:.1f}/s)"
+            for stage in self.STAGES
+        )
+        depth = " ".join(f"{name}={q.qsize()}/{q.maxsize}" for name, q in queues.items())
+        return f"{stages} | colas: {depth}"
+
+
+async def _scrape_store_catalog(
+    store_name: str,
+    product_queue: asyncio.Queue,
+    stats: PipelineStats,
+    limit: Optional[int],
+    adaptive: bool,
+    max_concurrency: int,
+    bulk_catalog: bool,
+    http_cache: Optional[HTTPCache] = None,
+    archive: Optional[ResponseArchive] = None,
+):
+    """
+    Etapa fetch: rasca el catálogo de una tienda y encola (tienda, producto) en
+    product_queue. Se ejecuta en paralelo con las demás tiendas; la cola acotada
+    frena el scraping si el merge o la persistencia van por detrás.
+    """
+    category_url = STORE_CONFIGS[store_name][1]
+    print(f"\n{'─'*50}")
+    print(f"🏪 Scraping catálogo: {store_name}")
+    print(f"{'─'*50}")
+
+    scraper = make_scraper(store_name, http_cache, archive)
+    await scraper.init()
+
+    async def emit(product):
+        stats.counts["fetch"] += 1
+        await product_queue.put((store_name, product))
+
+    try:
+        # --- Procesamiento Concurrente ---
+        semaphore = make_concurrency_limiter(
+            scraper, store_name, FULL_CONCURRENCY, adaptive, max_concurrency
+        )
+
+        if bulk_catalog and scraper.supports_bulk_catalog:
+            products = await scraper.scrape_catalog(category_url, limit, semaphore)
+            print(f"  📦 [{store_name}] {len(products)} productos obtenidos del listado (modo bulk).")
+            for product in products:
+                await emit(product)
+            return
+
+        product_urls = await scraper.scrape_category(category_url)
+        print(f"  🔗 [{store_name}] {len(product_urls)} URLs encontradas en catálogo.")
+
+        if limit:
+            product_urls = product_urls[:limit]
+            print(f"  ⚙️  [{store_name}] Limitado a {limit} productos.")
+
+        async def ScrapeAndEmit(url, idx):
+            async with semaphore:
+                print(f"  [{store_name} {idx+1}/{len(product_urls)}] Scraping: {url}")
+                try:
+                    product = await scraper.scrape_product(url)
+                    if product:
+                        await emit(product)
+                        print(f"    ✅ {product.name}")
+                    else:
+                        print(f"    ⚠️  No se pudo extraer producto: {url}")
+                except Exception as e:
+                    stats.errors["fetch"] += 1
+                    print(f"    ❌ Error en {url}: {e}")
+
+        tasks = [ScrapeAndEmit(url, i) for i, url in enumerate(product_urls)]
+        await asyncio.gather(*tasks)
+
+    except Exception as e:
+        stats.errors["fetch"] += 1
+        print(f"  ❌ Error crítico en {store_name}: {e}")
+    finally:
+        await scraper.close()
+
+
+async def _merge_stage(
+    manager: RacketManager,
+    product_queue: asyncio.Queue,
+    touched: Dict[str, None],
+    seen_slugs_per_store: Dict[str, Set[str]],
+    stats: PipelineStats,
+):
+    """
+    Etapa merge: consume product_queue por lotes (lo que haya disponible, hasta
+    PIPELINE_MERGE_BATCH) y los fusiona con RacketManager.merge_products en un
+    hilo, agrupados por tienda, para no bloquear el event loop de los scrapers.
+    Anota en touched (en orden) cada slug fusionado. Termina al recibir None.
+    """
+    done = False
+    while not done:
+        batch = [await product_queue.get()]
+        while len(batch) < PIPELINE_MERGE_BATCH and not product_queue.empty():
+            batch.append(product_queue.get_nowait())
+        if None in batch:
+            done = True
+
+        by_store: Dict[str, list] = {}
+        for item in batch:
+            if item is not None:
+                by_store.setdefault(item[0], []).append(item[1])
+
+        for store_name, products in by_store.items():
+            try:
+                slugs = await asyncio.to_thread(manager.merge_products, products, store_name)
+            except Exception as e:
+                stats.errors["merge"] += len(products)
+                print(f"    ❌ Error fusionando lote de {store_name}: {e}")
+                continue
+            stats.counts["merge"] += len(products)
+            for slug in slugs:
+                if slug:
+                    seen_slugs_per_store[store_name].add(slug)
+                    touched[slug] = None
+
+
+def _persist_rackets(
+    client: Client,
+    rackets: List[Tuple[str, dict]],
+    slug_id_map: Dict[str, int],
+    current_db_prices: Dict[int, Dict[str, Optional[float]]],
+    dry_run: bool,
+    totals: Dict[str, int],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    synced_hashes: Optional[Dict[str, dict]] = None,
+    price_history: Optional[PriceHistoryBuffer] = None,
+) -> Dict[str, int]:
+    """
+    Upsert en bloque de varios rackets (saltando los que no cambiaron desde la
+    última sincronización) y registro en price_history de sus cambios de
+    precio. Devuelve {slug: id} de los rackets escritos o sin cambios.
+
+    Las filas de price_history se encolan en price_history (que se vacía al
+    final de la etapa); sin buffer se insertan al terminar la llamada.
+    """
+    history = price_history or PriceHistoryBuffer(client, dry_run)
+    skipped: List[str] = []
+    ids = upsert_rackets_bulk(
+        client, rackets, slug_id_map, dry_run, chunk_size, synced_hashes, skipped,
+    )
+    totals["unchanged"] = totals.get("unchanged", 0) + len(skipped)
+
+    for slug, racket in rackets:
+        db_id = ids.get(slug)
+        if not db_id:
+            continue
+
+        # Comprobar cambios de precio y registrar en price_history
+        old_prices = current_db_prices.setdefault(db_id, {})
+        for entry in racket.get("prices", []):
+            store = entry.get("store")
+            new_price = entry.get("price")
+            original = entry.get("original_price")
+
+            if not store or new_price is None:
+                continue
+
+            old_price = old_prices.get(store)
+
+            # Solo registrar si el precio ha cambiado respecto al valor en DB
+            if old_price is None or abs(float(old_price) - float(new_price)) > 0.01:
+                discount = 0
+                if original and original > new_price:
+                    discount = round((1 - new_price / original) * 100)
+
+                print(f"  💰 {slug} [{store}]: {old_price} → {new_price} €")
+                history.add(db_id, store, new_price, original, discount)
+                if old_price is None:
+                    totals["new"] += 1
+                else:
+                    totals["updated"] += 1
+                # Un racket cuyo upsert falló se reintenta al final del run:
+                # no registrar dos veces el mismo cambio.
+                old_prices[store] = new_price
+
+    if price_history is None:
+        history.flush()
+    return ids
+
+
+async def _persist_stage(
+    slugs: List[str],
+    manager: RacketManager,
+    slug_id_map: Dict[str, int],
+    current_db_prices: Dict[int, Dict[str, Optional[float]]],
+    dry_run: bool,
+    persisted: Set[str],
+    totals: Dict[str, int],
+    stats: PipelineStats,
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    synced_hashes: Optional[Dict[str, dict]] = None,
+    price_history: Optional[PriceHistoryBuffer] = None,
+):
+    """
+    Etapa persist: escribe en Supabase el estado final de las palas de slugs,
+    en lotes de chunk_size con un upsert en bloque en un hilo, y vacía
+    price_history al terminar.
+
+    Se ejecuta cuando todas las tiendas han terminado y sus productos están
+    fusionados: una pala puede recibir productos de varias tiendas (o dos
+    listados de la misma), y escribirla antes subiría datos parciales y
+    registraría en price_history precios intermedios.
+    """
+    if not supabase:
+        return
+    for batch in _chunks(slugs, chunk_size):
+        def write_batch(batch=batch):
+            snapshot = list(manager.snapshot(batch).items())
+            try:
+                ids = _persist_rackets(
+                    supabase, snapshot, slug_id_map, current_db_prices, dry_run, totals, chunk_size,
+                    synced_hashes, price_history,
+                )
+                stats.counts["persist"] += len(snapshot)
+                if not dry_run:
+                    stats.errors["persist"] += len(snapshot) - len(ids)
+            except Exception as e:
+                stats.errors["persist"] += len(snapshot)
+                print(f"    ❌ Error persistiendo lote de {len(snapshot)} palas: {e}")
+                return
+            # Solo las escritas: el resto se reintenta al final del run
+            persisted.update(slug for slug, _ in snapshot if slug in ids)
+
+        await asyncio.to_thread(write_batch)
+
+    if price_history:
+        await asyncio.to_thread(price_history.flush)
+
+
+async def _report_pipeline(stats: PipelineStats, queues: Dict[str, asyncio.Queue]):
+    """Imprime periódicamente el throughput de cada etapa y la ocupación de las colas."""
+    while True:
+        await asyncio.sleep(PIPELINE_REPORT_INTERVAL)
+        print(f"  ⏱️  {stats.line(queues)}")
+
+
 # ── Modo FULL ──────────────────────────────────────────────────────────────────
 
 async def run_full_sync(
     target_stores: list,
     limit: Optional[int],
     dry_run: bool,
+    adaptive: bool = False,
+    max_concurrency: int = MAX_ADAPTIVE_CONCURRENCY,
+    bulk_catalog: bool = True,
+    http_cache_dir: Optional[str] = None,
+    archive: Optional[ResponseArchive] = None,
+    compact_json: bool = False,
+    upsert_chunk_size: int = UPSERT_CHUNK_SIZE,
+    skip_unchanged: bool = True,
 ):
     """
     Scraping completo: recorre los catálogos, actualiza rackets.json y sincroniza
     con Supabase. Detecta palas nuevas y descatalogadas.
+
+    Funciona como un pipeline por etapas: fetch (scrapers, que ya devuelven
+    productos parseados) → merge (RacketManager), conectadas por una cola
+    acotada para que el merge se solape con el scraping y los productos en
+    vuelo estén acotados; al terminar el merge, persist escribe en Supabase el
+    estado final de cada pala una sola vez.
+
+    Con adaptive=True la concurrencia de cada tienda la regula un gobernador
+    AIMD (hasta max_concurrency) en lugar del valor fijo FULL_CONCURRENCY.
+
+    Con bulk_catalog=True las tiendas que lo soportan (products.json en Shopify,
+    GraphQL en PadelNuestro) construyen los productos directamente desde las
+    páginas del listado, pidiendo la ficha individual solo cuando faltan specs.
+
+    Con http_cache_dir las peticiones GET se revalidan contra una caché en disco
+    (ETag/Last-Modified): las páginas sin cambios responden 304 y se sirven
+    desde la caché.
+
+    Con archive (ResponseArchive) las respuestas de las tiendas se graban o se
+    reproducen desde un fichero, para medir el sync sin red.
+
+    Con compact_json=True rackets.json se escribe sin sangría.
+
+    Los rackets se escriben en Supabase con upserts en bloque de hasta
+    upsert_chunk_size filas por petición. Con skip_unchanged=True solo se
+    envían las filas cuyo contenido cambió desde la última sincronización
+    (hashes en SYNC_HASHES_JSON) o que se modificaron en Supabase después
+    (updated_at distinto, borradas o deduplicadas).
     """
     print(f"\n{'='*60}")
     print(f"🚀 MODO FULL — Tiendas: {target_stores}")
@@ -420,13 +1018,15 @@ async def run_full_sync(
         print("🧪 DRY-RUN ACTIVO — No se guardarán cambios")
     print(f"{'='*60}\n")
 
-    manager = RacketManager(RACKETS_JSON)
+    manager = RacketManager(RACKETS_JSON, compact=compact_json)
+    http_cache = HTTPCache(http_cache_dir) if http_cache_dir else None
     seen_slugs_per_store: Dict[str, Set[str]] = {s: set() for s in target_stores}
 
     # Cargar slug→id map de Supabase
     slug_id_map: Dict[str, int] = {}
+    row_versions: Dict[int, str] = {}
     if supabase:
-        slug_id_map = ensure_slug_column_populated(supabase, dry_run)
+        slug_id_map = ensure_slug_column_populated(supabase, dry_run, row_versions)
         print(f"📋 {len(slug_id_map)} slugs mapeados en Supabase.\n")
 
     # Cargar precios actuales en DB para detectar cambios
@@ -434,98 +1034,88 @@ async def run_full_sync(
     if supabase:
         current_db_prices = get_current_db_prices(supabase)
 
-    total_new = 0
-    total_updated = 0
-
+    totals = {"new": 0, "updated": 0, "unchanged": 0}
+    persisted: Set[str] = set()
+    synced_hashes = load_sync_hashes() if skip_unchanged else {}
+    if synced_hashes:
+        stale = reconcile_sync_hashes(synced_hashes, slug_id_map, row_versions)
+        if stale:
+            print(f"🔁 {stale} palas cambiaron en Supabase desde la última sincronización; se reescribirán.\n")
+    price_history = PriceHistoryBuffer(supabase, dry_run) if supabase else None
+
+    # Pipeline: cada tienda es un productor independiente (se rascan todas a la
+    # vez, cada una con su propio presupuesto de concurrencia) y un único
+    # consumidor serializa los merges. Las palas se escriben en Supabase por
+    # lotes cuando ya no puede llegar ningún producto más: primero las tocadas
+    # y a continuación las que no aparecieron en ninguna tienda, en una única
+    # pasada para que cada upsert lleve chunk_size filas.
+    stats = PipelineStats()
+    product_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    queues = {"productos": product_queue}
+    touched: Dict[str, None] = {}
+
+    merger = asyncio.create_task(_merge_stage(
+        manager, product_queue, touched, seen_slugs_per_store, stats,
+    ))
+    reporter = asyncio.create_task(_report_pipeline(stats, queues))
+
+    store_tasks = []
     for store_name in target_stores:
         if store_name not in STORE_CONFIGS:
             print(f"⚠️  Tienda desconocida: {store_name}. Skipping.")
             continue
-
-        cls, category_url = STORE_CONFIGS[store_name]
-        print(f"\n{'─'*50}")
-        print(f"🏪 Scraping catálogo: {store_name}")
-        print(f"{'─'*50}")
-
-        scraper = cls()
-        await scraper.init()
-
-        try:
-            product_urls = await scraper.scrape_category(category_url)
-            print(f"  🔗 {len(product_urls)} URLs encontradas en catálogo.")
-
-            if limit:
-                product_urls = product_urls[:limit]
-                print(f"  ⚙️  Limitado a {limit} productos.")
-
-            # --- Procesamiento Concurrente ---
-            MAX_CONCURRENT_SCRAPES = 2
-            semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
-
-            async def ScrapeAndMerge(url, idx):
-                async with semaphore:
-                    print(f"  [{idx+1}/{len(product_urls)}] Scraping: {url}")
-                    try:
-                        product = await scraper.scrape_product(url)
-                        if product:
-                            slug = manager.merge_product(product, store_name)
-                            if slug:
-                                seen_slugs_per_store[store_name].add(slug)
-                            print(f"    ✅ {product.name}")
-                        else:
-                            print(f"    ⚠️  No se pudo extraer producto: {url}")
-                    except Exception as e:
-                        print(f"    ❌ Error en {url}: {e}")
-
-            tasks = [ScrapeAndMerge(url, i) for i, url in enumerate(product_urls)]
-            await asyncio.gather(*tasks)
-
-        except Exception as e:
-            print(f"  ❌ Error crítico en {store_name}: {e}")
-        finally:
-            await scraper.close()
+        store_tasks.append(_scrape_store_catalog(
+            store_name, product_queue, stats, limit, adaptive, max_concurrency, bulk_catalog,
+            http_cache, archive,
+        ))
+    try:
+        await asyncio.gather(*store_tasks)
+        await product_queue.put(None)
+        await merger
+        untouched = [slug for slug in manager.data if slug not in touched]
+        await _persist_stage(
+            list(touched) + untouched, manager, slug_id_map, current_db_prices, dry_run, persisted, totals, stats,
+            upsert_chunk_size, synced_hashes, price_history,
+        )
+    finally:
+        reporter.cancel()
+    print(f"\n  📈 Pipeline: {stats.line(queues)}")
+    if any(stats.errors.values()):
+        print(f"  ⚠️  Errores por etapa: {stats.errors}")
+    if http_cache:
+        print(f"  🗄️  Caché HTTP: {http_cache.summary()}")
+    if archive:
+        print(f"  📼 Archivo: {archive.summary()}")
 
     # Guardar JSON
     if not dry_run:
-        manager.save_db()
-        print(f"\n💾 rackets.json guardado ({len(manager.data)} palas).")
+        if manager.save_db():
+            print(f"\n💾 rackets.json guardado ({len(manager.data)} palas).")
+        else:
+            print("\n💾 rackets.json sin cambios, no se reescribe.")
 
     # Sincronizar con Supabase
     if supabase:
-        print(f"\n{'─'*50}")
-        print("☁️  Sincronizando con Supabase...")
-        print(f"{'─'*50}")
-
-        for slug, racket in manager.data.items():
-            db_id = upsert_racket(supabase, slug, racket, slug_id_map, dry_run)
-
-            if not db_id:
-                continue
-
-            # Comprobar cambios de precio y registrar en price_history
-            old_prices = current_db_prices.get(db_id, {})
-            for entry in racket.get("prices", []):
-                store = entry.get("store")
-                new_price = entry.get("price")
-                original = entry.get("original_price")
-
-                if not store or new_price is None:
-                    continue
-
-                old_price = old_prices.get(store)
-
-                # Solo registrar si el precio ha cambiado respecto al valor en DB
-                if old_price is None or abs(float(old_price) - float(new_price)) > 0.01:
-                    discount = 0
-                    if original and original > new_price:
-                        discount = round((1 - new_price / original) * 100)
-
-                    print(f"  💰 {slug} [{store}]: {old_price} → {new_price} €")
-                    record_price_history(supabase, db_id, store, new_price, original, discount, dry_run)
-                    if old_price is None:
-                        total_new += 1
-                    else:
-                        total_updated += 1
+        # Todas las palas se persistieron en el pipeline; solo se reintentan
+        # las que fallaron.
+        pending = [] if dry_run else [slug for slug in manager.data if slug not in persisted]
+        if pending:
+            print(f"\n{'─'*50}")
+            print(f"☁️  Reintentando {len(pending)} palas pendientes en Supabase...")
+            print(f"{'─'*50}")
+
+            def write_pending():
+                _persist_rackets(
+                    supabase, [(slug, manager.data[slug]) for slug in pending],
+                    slug_id_map, current_db_prices, dry_run, totals, upsert_chunk_size, synced_hashes,
+                    price_history,
+                )
+                price_history.flush()
+
+            await asyncio.to_thread(write_pending)
+        if not dry_run:
+            print(f"  📜 price_history: {price_history.summary()}")
+            save_sync_hashes(synced_hashes)
 
         # Marcar descatalogadas
         print(f"\n{'─'*50}")
@@ -535,15 +1125,20 @@ async def run_full_sync(
     print(f"\n{'='*60}")
     print(f"🏁 FULL SYNC completado.")
     print(f"   Palas en JSON:         {len(manager.data)}")
-    print(f"   Nuevas en price_hist:  {total_new}")
-    print(f"   Actualizadas:          {total_updated}")
+    print(f"   Nuevas en price_hist:  {totals['new']}")
+    print(f"   Actualizadas:          {totals['updated']}")
+    print(f"   Filas sin cambios:     {totals['unchanged']}")
     print(f"{'='*60}\n")
 
     # Deduplicar tras cada full sync para eliminar variantes de nombre (ej. "by player")
     if supabase:
         print(f"\n{'─'*50}")
         print("🔁 Deduplicando catálogo...")
-        run_deduplication(dry_run=dry_run)
+        touched = run_deduplication(dry_run=dry_run)
+        # Las filas fusionadas o borradas ya no coinciden con su hash
+        dropped = [slug for slug in touched if synced_hashes.pop(slug, None) is not None]
+        if dropped and not dry_run:
+            save_sync_hashes(synced_hashes)
         print(f"{'─'*50}\n")
 
 
@@ -561,8 +1156,16 @@ async def _process_single_price(
     supabase: Optional[Client],
     dry_run: bool,
     slug_id_map: Dict[str, int],
+    price_feeds: Optional[Dict[str, dict]] = None,
+    price_history: Optional[PriceHistoryBuffer] = None,
 ):
-    """Procesa un solo producto (función helper para procesamiento concurrente)."""
+    """
+    Procesa un solo producto (función helper para procesamiento concurrente).
+
+    Si la tienda tiene feed de precios (price_feeds[store]) y la URL aparece en él,
+    se usa ese precio; si no, se re-rasca la URL individualmente. Los cambios de
+    precio se encolan en price_history, que el llamador vacía al terminar.
+    """
     
     # Resolver db_id: primero por slug, luego fallback por model_name normalizado
     resolved_db_id = db_id
@@ -593,7 +1196,17 @@ async def _process_single_price(
         scraper = scrapers[store]
 
         try:
-            product = await scraper.scrape_product(url)
+            product = None
+            feed = (price_feeds or {}).get(store)
+            if feed:
+                product = feed.get(scraper.price_feed_key(url))
+
+            if product is None:
+                if scraper.concurrency:
+                    async with scraper.concurrency:
+                        product = await scraper.scrape_product(url)
+                else:
+                    product = await scraper.scrape_product(url)
 
             if product and product.price and product.price > 0:
                 new_price = product.price
@@ -618,11 +1231,8 @@ async def _process_single_price(
                         racket_changed = True
                         prices_info.append(f"{store}:{old_price}€→{new_price}€")
 
-                    if resolved_db_id and supabase:
-                        record_price_history(
-                            supabase, resolved_db_id, store,
-                            new_price, original, discount, dry_run
-                        )
+                    if resolved_db_id and price_history:
+                        price_history.add(resolved_db_id, store, new_price, original, discount)
 
             else:
                 db_updates[f"{store}_actual_price"] = None
@@ -641,11 +1251,28 @@ async def run_prices_sync(
     target_stores: list,
     limit: Optional[int],
     dry_run: bool,
+    adaptive: bool = False,
+    max_concurrency: int = MAX_ADAPTIVE_CONCURRENCY,
+    bulk_feed: bool = True,
+    http_cache_dir: Optional[str] = None,
+    archive: Optional[ResponseArchive] = None,
+    compact_json: bool = False,
 ):
     """
     Actualización rápida de precios: re-rasca las URLs ya conocidas sin tocar
     el catálogo completo. Registra en price_history solo si el precio cambió.
     Versión optimizada con concurrencia.
+
+    Con adaptive=True cada tienda tiene su propio gobernador AIMD (hasta
+    max_concurrency) que limita las peticiones simultáneas a esa tienda.
+
+    Con bulk_feed=True las tiendas con feed de precios (Shopify y PadelNuestro)
+    se leen una sola vez completas y solo se re-rascan las URLs que no aparecen
+    en el feed.
+
+    Con http_cache_dir las peticiones GET se revalidan contra la caché HTTP en
+    disco (ver run_full_sync). archive graba/reproduce las respuestas igual
+    que en run_full_sync, y compact_json escribe rackets.json sin sangría.
     """
     print(f"\n{'='*60}")
     print(f"💸 MODO PRICES — Tiendas: {target_stores}")
@@ -654,8 +1281,8 @@ async def run_prices_sync(
     print(f"{'='*60}\n")
 
     # Cargar JSON
-    with open(RACKETS_JSON, "r", encoding="utf-8") as f:
-        rackets_data: dict = json.load(f)
+    manager = RacketManager(RACKETS_JSON, compact=compact_json)
+    rackets_data: dict = manager.data
 
     # Cargar slug→id map y precios actuales desde Supabase
     slug_id_map: Dict[str, int] = {}
@@ -663,24 +1290,65 @@ async def run_prices_sync(
     if supabase:
         slug_id_map = ensure_slug_column_populated(supabase, dry_run)
         current_db_prices = get_current_db_prices(supabase)
+    # Las filas que se actualicen aquí ya no coinciden con el último hash del full sync
+    synced_hashes = load_sync_hashes()
+    hashes_invalidated = False
+    # add() se llama desde el event loop: no insertar ahí (bloquearía todas
+    # las tareas), solo al final en un hilo
+    price_history = PriceHistoryBuffer(supabase, dry_run, auto_flush=False) if supabase else None
 
     # Instanciar solo los scrapers necesarios
+    http_cache = HTTPCache(http_cache_dir) if http_cache_dir else None
     scrapers = {}
     for store in target_stores:
         if store in STORE_CONFIGS:
-            scrapers[store] = STORE_CONFIGS[store][0]()
+            scrapers[store] = make_scraper(store, http_cache, archive)
+            await scrapers[store].init()
 
     racket_ids = list(rackets_data.keys())
     if limit:
         racket_ids = racket_ids[:limit]
 
+    # Feeds de precios: una pasada completa al listado de cada tienda que lo soporte
+    price_feeds: Dict[str, dict] = {}
+    if bulk_feed:
+        known_urls: Dict[str, list] = {s: [] for s in scrapers}
+        for slug in racket_ids:
+            for entry in rackets_data[slug].get("prices", []):
+                if entry.get("store") in known_urls and entry.get("url"):
+                    known_urls[entry["store"]].append(entry["url"])
+
+        feed_stores = [s for s, scraper in scrapers.items() if scraper.supports_price_feed]
+        feed_results = await asyncio.gather(
+            *(scrapers[s].fetch_price_feed(STORE_CONFIGS[s][1], known_urls[s]) for s in feed_stores),
+            return_exceptions=True,
+        )
+        for store, feed in zip(feed_stores, feed_results):
+            if isinstance(feed, Exception):
+                print(f"⚠️  Feed de precios de {store} no disponible: {feed}")
+                continue
+            price_feeds[store] = feed
+
+        for store, feed in price_feeds.items():
+            scraper = scrapers[store]
+            known = known_urls[store]
+            hits = sum(1 for url in known if scraper.price_feed_key(url) in feed)
+            print(f"📰 Feed {store}: {len(feed)} productos, {hits}/{len(known)} URLs conocidas "
+                  f"resueltas (el resto se re-rasca una a una).")
+
     processed = updated = errors = 0
     total = len(racket_ids)
 
-    # Concurrencia: semaphore para limitar peticiones simultáneas
-    MAX_CONCURRENT = 5
-    RATE_LIMIT_DELAY = 0.5  # Segundos entre batches para evitar bloqueos
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    # Concurrencia: semaphore para limitar peticiones simultáneas.
+    # El ritmo de peticiones por tienda lo impone el RateLimiter de cada scraper;
+    # en modo adaptativo, el gobernador AIMD de cada tienda limita además sus
+    # peticiones en vuelo y el semáforo global solo acota la memoria.
+    if adaptive:
+        for store, scraper in scrapers.items():
+            make_concurrency_limiter(scraper, store, PRICES_CONCURRENCY, True, max_concurrency)
+        semaphore = asyncio.Semaphore(max_concurrency * max(1, len(scrapers)))
+    else:
+        semaphore = asyncio.Semaphore(PRICES_CONCURRENCY)
 
     async def process_with_semaphore(idx, slug):
         async with semaphore:
@@ -688,10 +1356,6 @@ async def run_prices_sync(
             model_name = racket.get("model", slug)
             db_id = slug_id_map.get(slug)
             
-            # Rate limiting: delay incremental para evitar sobrecarga
-            if idx > 0 and idx % 20 == 0:
-                await asyncio.sleep(RATE_LIMIT_DELAY)
-            
             # Mostrar progreso cada 20 productos
             if idx % 20 == 0:
                 print(f"\n📦 [{idx+1}/{total}] Procesando...")
@@ -699,7 +1363,7 @@ async def run_prices_sync(
             result = await _process_single_price(
                 slug, racket, model_name, db_id,
                 scrapers, target_stores, {}, current_db_prices,
-                supabase, dry_run, slug_id_map,
+                supabase, dry_run, slug_id_map, price_feeds, price_history,
             )
             # Unpack new return value (including prices_info)
             res = (idx, result) if isinstance(result, tuple) else (idx, (*result, []))
@@ -708,6 +1372,10 @@ async def run_prices_sync(
     # Procesar concurrentemente
     tasks = [process_with_semaphore(i, slug) for i, slug in enumerate(racket_ids)]
     results = await asyncio.gather(*tasks, return_exceptions=True)
+    if price_history:
+        await asyncio.to_thread(price_history.flush)
+        if not dry_run:
+            print(f"📜 price_history: {price_history.summary()}")
 
     # Recolectar resultados y actualizar JSON
     for task_result in results:
@@ -724,7 +1392,6 @@ async def run_prices_sync(
             slug, db_id, db_updates, racket_changed, prices_info = task_data
         
         idx = task_result[0]
-        racket = rackets_data[slug]
         processed += 1
 
         # Loggear resultados de tiendas
@@ -735,16 +1402,22 @@ async def run_prices_sync(
         for store in target_stores:
             price_updated = db_updates.get(f"{store}_actual_price")
             if price_updated is not None:
-                # Buscar y actualizar el price_entry correspondiente
-                for price_entry in racket.get("prices", []):
-                    if price_entry.get("store") == store:
-                        price_entry["price"] = price_updated
-                        price_entry["original_price"] = db_updates.get(f"{store}_original_price")
-                        price_entry["last_updated"] = now_utc()
-                        if racket_changed:
-                            print(f"    💰 [{store}] Actualizado en BD")
-                        updated += 1
-                        break
+                # Actualizar el price_entry de la tienda
+                price_entry = manager.get_price(slug, store)
+                if price_entry is not None:
+                    new_original = db_updates.get(f"{store}_original_price")
+                    # Solo se toca la entrada (y last_updated) si el precio cambió,
+                    # para no reescribir rackets.json en ejecuciones sin cambios
+                    if (price_entry.get("price"), price_entry.get("original_price")) != (price_updated, new_original):
+                        manager.set_price(
+                            slug, store,
+                            price=price_updated,
+                            original_price=new_original,
+                            last_updated=now_utc(),
+                        )
+                    if racket_changed:
+                        print(f"    💰 [{store}] Actualizado en BD")
+                    updated += 1
             elif db_updates.get(f"{store}_actual_price") is not None:
                 errors += 1
 
@@ -774,17 +1447,26 @@ async def run_prices_sync(
                     supabase.table("rackets").update(db_updates).eq("id", db_id).execute()
                 except Exception as e:
                     print(f"  ❌ Supabase error: {e}")
+                if synced_hashes.pop(slug, None) is not None:
+                    hashes_invalidated = True
 
     # Guardar JSON al final (una sola vez, no en cada iteración)
     if not dry_run:
-        with open(RACKETS_JSON, "w", encoding="utf-8") as f:
-            json.dump(rackets_data, f, indent=4, ensure_ascii=False)
-        print(f"\n💾 rackets.json guardado.")
+        if manager.save_db():
+            print(f"\n💾 rackets.json guardado.")
+        else:
+            print("\n💾 rackets.json sin cambios, no se reescribe.")
+        if hashes_invalidated:
+            save_sync_hashes(synced_hashes)
 
     # Cerrar scrapers
     for s in scrapers.values():
         if hasattr(s, "close"):
             await s.close()
+    if http_cache:
+        print(f"🗄️  Caché HTTP: {http_cache.summary()}")
+    if archive:
+        print(f"📼 Archivo: {archive.summary()}")
 
     print(f"\n{'='*60}")
     print(f"🏁 PRICES SYNC completado.")
@@ -820,6 +1502,76 @@ if __name__ == "__main__":
         default=None,
         help="Limitar el número de productos por tienda (útil para pruebas).",
     )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Concurrencia adaptativa (AIMD) por tienda según 403/429/timeouts y latencia.",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=MAX_ADAPTIVE_CONCURRENCY,
+        help=f"Concurrencia máxima por tienda en modo --adaptive (default: {MAX_ADAPTIVE_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--no-bulk",
+        action="store_true",
+        help="Desactiva la lectura en bloque de los listados (catálogo en full, feed de precios "
+             "en prices) y pide cada producto por separado.",
+    )
+    parser.add_argument(
+        "--http-cache",
+        nargs="?",
+        const=HTTP_CACHE_DIR,
+        default=None,
+        metavar="DIR",
+        help=f"Revalida las peticiones con una caché HTTP en disco (ETag/Last-Modified). "
+             f"Sin DIR usa {HTTP_CACHE_DIR}.",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        default=None,
+        help="Graba todas las respuestas de las tiendas en FILE (JSON lines comprimido con gzip).",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        default=None,
+        help="Reproduce las respuestas grabadas en FILE sin acceder a la red ni a Supabase "
+             "(benchmark offline).",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        nargs=2,
+        default=(0.0, 0.0),
+        metavar=("MIN", "MAX"),
+        help="Latencia simulada por respuesta en --replay, en segundos (default: 0 0).",
+    )
+    parser.add_argument(
+        "--replay-error-rate",
+        type=float,
+        default=0.0,
+        help="Fracción de respuestas que --replay convierte en errores 503 (default: 0).",
+    )
+    parser.add_argument(
+        "--compact-json",
+        action="store_true",
+        help="Escribe rackets.json sin sangría (más pequeño, pero con diffs de git ilegibles).",
+    )
+    parser.add_argument(
+        "--upsert-chunk",
+        type=int,
+        default=UPSERT_CHUNK_SIZE,
+        help=f"Filas por petición en los upserts en bloque a Supabase (default: {UPSERT_CHUNK_SIZE}).",
+    )
+    parser.add_argument(
+        "--rewrite-all",
+        action="store_true",
+        help="En modo full, reescribe en Supabase todas las palas aunque no hayan cambiado "
+             "desde la última sincronización.",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -829,7 +1581,37 @@ if __name__ == "__main__":
     args = parser.parse_args()
     target_stores = [s.strip() for s in args.stores.split(",")]
 
-    if args.mode == "full":
-        asyncio.run(run_full_sync(target_stores, args.limit, args.dry_run))
-    else:
-        asyncio.run(run_prices_sync(target_stores, args.limit, args.dry_run))
+    if args.record and args.replay:
+        parser.error("--record y --replay son incompatibles.")
+    archive: Optional[ResponseArchive] = None
+    if args.record:
+        archive = ResponseArchive(args.record, mode="record")
+    elif args.replay:
+        archive = ResponseArchive(
+            args.replay, mode="replay",
+            latency=tuple(args.replay_latency), error_rate=args.replay_error_rate,
+        )
+        if supabase:
+            print("📼 Modo replay: sincronización con Supabase desactivada.")
+        supabase = None
+
+    started = time.monotonic()
+    try:
+        if args.mode == "full":
+            asyncio.run(run_full_sync(
+                target_stores, args.limit, args.dry_run, args.adaptive, args.max_concurrency,
+                bulk_catalog=not args.no_bulk, http_cache_dir=args.http_cache, archive=archive,
+                compact_json=args.compact_json,
+                upsert_chunk_size=args.upsert_chunk, skip_unchanged=not args.rewrite_all,
+            ))
+        else:
+            asyncio.run(run_prices_sync(
+                target_stores, args.limit, args.dry_run, args.adaptive, args.max_concurrency,
+                bulk_feed=not args.no_bulk, http_cache_dir=args.http_cache, archive=archive,
+                compact_json=args.compact_json,
+            ))
+    finally:
+        if archive and archive.mode == "record":
+            archive.save()
+            print(f"📼 {archive.summary()}")
+    print(f"⏱️  Tiempo total: {time.monotonic() - started:.1f}s")
@@ -0,0 +1,150 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The scrapers are imported as src.scrapers, as the sync workflow runs them
+# (python -m src.scrapers.sync_catalog from the repository root)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# sync_catalog imports deduplicate_rackets, which requires these at import
+# time; the tests pass their own fake clients and never reach Supabase
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+
+
+class FakeQuery:
+    """Just enough of the supabase-py/PostgREST query builder for the sync code."""
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.op = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.bounds = None
+
+    def select(self, columns="*", **kwargs):
+        self.op = "select"
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict="id", **kwargs):
+        self.op, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.op, self.payload = "update", payload
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, expression):
+        conditions = [part.split(".", 1) for part in expression.split(",")]
+
+        def match(row):
+            for column, condition in conditions:
+                value = row.get(column)
+                if condition == "is.null" and value is None:
+                    return True
+                if condition == "not.is.null" and value is not None:
+                    return True
+                if condition.startswith("lt.") and value is not None \
+                        and _timestamp(value) < _timestamp(condition[3:]):
+                    return True
+            return False
+
+        self.filters.append(match)
+        return self
+
+    def order(self, column, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        batch = self.payload if isinstance(self.payload, list) else [self.payload]
+        self.db.calls.append((self.table, self.op, len(batch)))
+        if self.db.fail and self.db.fail(self.table, self.op, batch):
+            raise RuntimeError(f"{self.op} on {self.table} rejected")
+        matching = [row for row in rows if all(f(row) for f in self.filters)]
+
+        if self.op == "select":
+            matching.sort(key=lambda row: row.get("id", 0))
+            start, end = self.bounds or (0, len(matching))
+            end = min(end + 1, start + self.db.max_rows)
+            return SimpleNamespace(data=[dict(row) for row in matching[start:end]])
+        if self.op == "update":
+            for row in matching:
+                row.update(self.payload)
+            return SimpleNamespace(data=[dict(row) for row in matching])
+
+        if len({frozenset(row) for row in batch}) > 1:
+            raise RuntimeError("PGRST102: All object keys must match")
+        written = []
+        for payload in batch:
+            existing = None
+            if self.op == "upsert":
+                existing = next((r for r in rows if r.get(self.on_conflict) == payload.get(self.on_conflict)), None)
+            if existing is not None:
+                existing.update(payload)
+                written.append(dict(existing))
+            else:
+                row = dict(payload)
+                row.setdefault("id", self.db.next_id())
+                rows.append(row)
+                written.append(dict(row))
+        return SimpleNamespace(data=written)
+
+
+def _timestamp(value: str) -> str:
+    # Fixed-width UTC timestamps compare correctly as strings
+    return value.replace("+00:00", "Z")[:19]
+
+
+class FakeSupabase:
+    """In-memory stand-in for the Supabase client: tables are lists of dicts.
+
+    `calls` records (table, operation, rows) per request; `fail(table, op,
+    rows)` can reject requests; selects return at most `max_rows` rows, like
+    PostgREST's max-rows setting.
+    """
+
+    def __init__(self, max_rows: int = 1000):
+        self.tables = {}
+        self.calls = []
+        self.fail = None
+        self.max_rows = max_rows
+        self._last_id = 0
+
+    def next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def count(self, table: str, op: str) -> int:
+        return sum(1 for t, o, _ in self.calls if (t, o) == (table, op))
+
+
+@pytest.fixture
+def fake_supabase():
+    return FakeSupabase()
@@ -0,0 +1,393 @@
+import asyncio
+import gzip
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.scrapers.base_scraper import (
+    AdaptiveConcurrency, BaseScraper, HTTPCache, HTTPStatusError, RateLimiter, ResponseArchive,
+    get_rate_limiter,
+)
+
+
+class StubScraper(BaseScraper):
+    """Bare BaseScraper with the rate limit off, for transport tests."""
+    rate_limit = 0.0
+
+    async def scrape_product(self, url):
+        return None
+
+    async def scrape_category(self, url):
+        return []
+
+
+def serve(handlers, scenario):
+    """Run scenario(base_url) against a local aiohttp server with GET `handlers` ({path: handler})."""
+    async def main():
+        app = web.Application()
+        app.add_routes([web.get(path, handler) for path, handler in handlers.items()])
+        async with TestServer(app) as server:
+            return await scenario(str(server.make_url('')).rstrip('/'))
+    return asyncio.run(main())
+
+
+# ── Shared session ─────────────────────────────────────────────────────────────
+
+def test_requests_reuse_the_pooled_session_and_its_connections():
+    peers = []
+
+    async def page(request):
+        peers.append(request.transport.get_extra_info('peername'))
+        return web.Response(body=gzip.compress(b'{"ok": true}'),
+                            headers={'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+
+    async def scenario(base):
+        scraper = StubScraper()
+        await scraper.init()
+        session = scraper._session
+        await scraper.init()  # idempotent: keeps the same session
+        assert scraper._session is session
+        results = [await scraper.fetch_json(f"{base}/page") for _ in range(5)]
+        await scraper.close()
+        assert scraper._session is None and session.closed
+        return results
+
+    assert serve({'/page': page}, scenario) == [{'ok': True}] * 5
+    # Keep-alive: every sequential request went over the same connection
+    assert len(set(peers)) == 1
+
+
+def test_error_statuses_raise_http_status_error():
+    async def gone(request):
+        return web.Response(status=410)
+
+    async def scenario(base):
+        scraper = StubScraper()
+        try:
+            # No explicit init(): the first request opens the session
+            with pytest.raises(HTTPStatusError) as err:
+                await scraper.fetch_text(f"{base}/gone")
+        finally:
+            await scraper.close()
+        return err.value
+
+    error = serve({'/gone': gone}, scenario)
+    assert error.status == 410 and error.url.endswith('/gone')
+
+
+# ── RateLimiter ────────────────────────────────────────────────────────────────
+
+def _grant_times(limiter, n, before=None):
+    """Seconds after start at which each of n concurrent acquire() calls returned."""
+    async def main():
+        if before:
+            before(limiter)
+        started = time.monotonic()
+        grants = []
+
+        async def one():
+            await limiter.acquire()
+            grants.append(time.monotonic() - started)
+
+        await asyncio.gather(*(one() for _ in range(n)))
+        return grants
+    return asyncio.run(main())
+
+
+def test_rate_limiter_spends_the_burst_then_spaces_requests_at_the_rate():
+    grants = _grant_times(RateLimiter(rate=20.0, burst=2), 6)
+    assert grants[1] < 0.03  # the two burst tokens are granted at once
+    # The other four wait for one token each at 20/s
+    assert 0.18 <= grants[-1] < 0.5
+    gaps = [b - a for a, b in zip(grants[1:], grants[2:])]
+    assert all(gap >= 0.04 for gap in gaps)
+
+
+def test_rate_limiter_pause_holds_every_request_to_the_host():
+    grants = _grant_times(RateLimiter(rate=100.0, burst=5), 3, before=lambda limiter: limiter.pause(0.2))
+    assert min(grants) >= 0.19
+
+
+def test_rate_limiter_without_rate_never_waits():
+    assert max(_grant_times(RateLimiter(rate=0.0), 50)) < 0.05
+
+
+def test_scrapers_share_one_limiter_per_host():
+    a, b = StubScraper(rate_limit=1.0), StubScraper(rate_limit=5.0)
+    shared = a.rate_limiter("https://shop.example/products/1")
+    assert b.rate_limiter("https://shop.example/collections/all") is shared
+    assert a.rate_limiter("https://other.example/") is not shared
+    assert get_rate_limiter("shop.example", 9.0) is shared and shared.rate == 1.0
+    # throttle() pauses the host's limiter for every scraper using it
+    b.throttle("https://shop.example/x", 30)
+    assert shared._paused_until > time.monotonic() + 29
+
+
+# ── AdaptiveConcurrency ────────────────────────────────────────────────────────
+
+def test_aimd_grows_by_one_per_window_of_fast_responses():
+    governor = AdaptiveConcurrency("test", initial=2, maximum=4, latency_target=1.0)
+    # +1/limit per fast response: about one step per `limit` responses
+    for _ in range(2):
+        governor.record_success(0.1)
+    assert governor.current == 2
+    governor.record_success(0.1)
+    assert governor.current == 3
+    for _ in range(3):
+        governor.record_success(5.0)  # slow: no growth
+    assert governor.current == 3
+    for _ in range(20):
+        governor.record_success(0.1)
+    assert governor.current == 4  # capped at maximum
+
+
+def test_aimd_halves_once_per_cooldown_down_to_the_minimum():
+    governor = AdaptiveConcurrency("test", initial=16, minimum=3, maximum=16, cooldown=60)
+    governor.record_throttle()
+    governor.record_throttle()  # same burst of errors: counted once
+    assert governor.current == 8
+
+    governor = AdaptiveConcurrency("test", initial=16, minimum=3, maximum=16, cooldown=0)
+    for _ in range(5):
+        governor.record_throttle()
+    assert governor.current == 3
+
+
+def test_aimd_bounds_tasks_inside_the_governor():
+    governor = AdaptiveConcurrency("test", initial=2)
+    active, peak = 0, 0
+
+    async def task():
+        nonlocal active, peak
+        async with governor:
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def main():
+        await asyncio.gather(*(task() for _ in range(8)))
+
+    asyncio.run(main())
+    assert peak == 2
+
+
+def test_requests_report_throttling_and_fast_responses_to_the_governor():
+    async def ok(request):
+        return web.Response(text="ok")
+
+    async def busy(request):
+        return web.Response(status=429)
+
+    async def scenario(base):
+        scraper = StubScraper()
+        scraper.concurrency = AdaptiveConcurrency("test", initial=4, cooldown=60)
+        try:
+            for _ in range(5):
+                await scraper.fetch_text(f"{base}/ok")
+            grown = scraper.concurrency.current
+            with pytest.raises(HTTPStatusError):
+                await scraper.fetch_text(f"{base}/busy")
+        finally:
+            await scraper.close()
+        return grown, scraper.concurrency.current
+
+    assert serve({'/ok': ok, '/busy': busy}, scenario) == (5, 2)
+
+
+# ── paginate ───────────────────────────────────────────────────────────────────
+
+def _paginate(pages, max_pages, start=1, window=3):
+    """Run paginate over {page: items or exception}; return (items, requested pages, peak in flight)."""
+    scraper = StubScraper()
+    scraper.page_window = window
+    requested, in_flight, peak = [], 0, 0
+
+    async def fetch_page(page_num):
+        nonlocal in_flight, peak
+        requested.append(page_num)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later pages answer first: results must still come back in page order
+        await asyncio.sleep(0.001 * (10 - page_num % 10))
+        in_flight -= 1
+        result = pages.get(page_num, [])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    items = asyncio.run(scraper.paginate(fetch_page, max_pages, start))
+    return items, sorted(requested), peak
+
+
+def test_paginate_fetches_windows_in_parallel_until_an_empty_page():
+    pages = {n: [f"p{n}a", f"p{n}b"] for n in range(1, 5)}
+    items, requested, peak = _paginate(pages, max_pages=20)
+    assert items == [f"p{n}{x}" for n in range(1, 5) for x in "ab"]
+    # Windows 1-3 and 4-6; page 5 is empty so 6 is discarded and nothing else is asked
+    assert requested == [1, 2, 3, 4, 5, 6]
+    assert peak == 3
+
+
+def test_paginate_stops_at_a_failed_page_and_keeps_the_previous_ones():
+    pages = {1: ["a"], 2: ["b"], 3: RuntimeError("boom"), 4: ["d"]}
+    items, requested, _ = _paginate(pages, max_pages=20)
+    assert items == ["a", "b"] and requested == [1, 2, 3]
+
+
+def test_paginate_honours_start_and_max_pages():
+    pages = {n: [n] for n in range(1, 30)}
+    items, requested, _ = _paginate(pages, max_pages=7, start=2)
+    assert items == [2, 3, 4, 5, 6, 7] and requested == [2, 3, 4, 5, 6, 7]
+
+
+# ── HTTPCache ──────────────────────────────────────────────────────────────────
+
+class ConditionalPage:
+    """Handler answering 304 when If-None-Match matches the current ETag."""
+
+    def __init__(self, body, etag='"v1"'):
+        self.body, self.etag = body, etag
+        self.sent_validators = []
+
+    async def handle(self, request):
+        validator = request.headers.get('If-None-Match')
+        self.sent_validators.append(validator)
+        if validator is not None and validator == self.etag:
+            return web.Response(status=304, headers={'ETag': self.etag})
+        return web.Response(text=self.body, headers={'ETag': self.etag})
+
+
+def test_http_cache_revalidates_and_serves_304s_from_disk(tmp_path):
+    page = ConditionalPage("catalog v1")
+
+    async def plain(request):
+        return web.Response(text="no validators")
+
+    async def scenario(base):
+        scraper = StubScraper(http_cache=HTTPCache(str(tmp_path)))
+        try:
+            bodies = [await scraper.fetch_text(f"{base}/page") for _ in range(2)]
+            page.body, page.etag = "catalog v2", '"v2"'
+            bodies.append(await scraper.fetch_text(f"{base}/page"))
+            bodies.append(await scraper.fetch_text(f"{base}/page"))
+            bodies += [await scraper.fetch_text(f"{base}/plain") for _ in range(2)]
+        finally:
+            await scraper.close()
+        return bodies, scraper.http_cache
+
+    bodies, cache = serve({'/page': page.handle, '/plain': plain}, scenario)
+    assert bodies == ["catalog v1", "catalog v1", "catalog v2", "catalog v2", "no validators", "no validators"]
+    assert page.sent_validators == [None, '"v1"', '"v1"', '"v2"']
+    # Only responses with an ETag/Last-Modified are stored
+    assert (cache.hits, cache.misses, cache.stores) == (2, 4, 2)
+
+
+def test_stray_304_without_a_cached_body_is_fetched_again(tmp_path):
+    page = ConditionalPage("fresh body")
+
+    async def scenario(base):
+        scraper = StubScraper(http_cache=HTTPCache(str(tmp_path)))
+        try:
+            # The caller's own validator matches, but nothing is cached to serve
+            return await scraper.fetch_text(f"{base}/page", headers={'If-None-Match': '"v1"'})
+        finally:
+            await scraper.close()
+
+    assert serve({'/page': page.handle}, scenario) == "fresh body"
+    assert page.sent_validators == ['"v1"', None]
+
+
+def test_http_cache_ignores_unreadable_or_foreign_entries(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    assert cache.put("https://shop.test/a", {'ETag': '"x"'}, b"body")
+    assert cache.get("https://shop.test/a") == ({'etag': '"x"'}, b"body")
+    with open(cache._path("https://shop.test/a"), 'wb') as f:
+        f.write(b"not zlib")
+    assert cache.get("https://shop.test/a") is None
+    assert cache.get("https://shop.test/never-stored") is None
+    assert cache.conditional_headers({'etag': '"x"', 'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}) == {
+        'If-None-Match': '"x"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    }
+
+
+# ── ResponseArchive ────────────────────────────────────────────────────────────
+
+def test_archive_replays_recorded_responses_without_network(tmp_path):
+    path = str(tmp_path / "responses.jsonl.gz")
+    hits = {'page': 0}
+
+    async def page(request):
+        hits['page'] += 1
+        return web.Response(text=f"visit {hits['page']}", headers={'ETag': f'"{hits["page"]}"'})
+
+    async def graphql(request):
+        payload = await request.json()
+        return web.json_response({'echo': payload['query']})
+
+    async def record(base):
+        scraper = StubScraper(archive=ResponseArchive(path, mode='record'))
+        try:
+            responses = [await scraper.fetch_text(f"{base}/page") for _ in range(2)]
+            for query in ("a", "b"):
+                responses.append(await scraper.post_json(f"{base}/graphql", {'query': query}))
+        finally:
+            await scraper.close()
+        scraper.archive.save()
+        return base, responses
+
+    async def main():
+        app = web.Application()
+        app.add_routes([web.get('/page', page), web.post('/graphql', graphql)])
+        async with TestServer(app) as server:
+            recorded = await record(str(server.make_url('')).rstrip('/'))
+        return recorded
+
+    base, recorded = asyncio.run(main())
+    assert recorded == ["visit 1", "visit 2", {'echo': 'a'}, {'echo': 'b'}]
+
+    async def replay():
+        # The server is gone, and a limiter of one request per 100s would
+        # stall a live run: replays skip both
+        scraper = StubScraper(rate_limit=0.01, rate_burst=1, archive=ResponseArchive(path))
+        responses = [await scraper.fetch_text(f"{base}/page") for _ in range(3)]
+        # POSTs are matched on their body, whatever the order
+        responses.append(await scraper.post_json(f"{base}/graphql", {'query': 'b'}))
+        responses.append(await scraper.post_json(f"{base}/graphql", {'query': 'a'}))
+        with pytest.raises(HTTPStatusError) as err:
+            await scraper.fetch_text(f"{base}/never-recorded")
+        assert scraper._session is None
+        return responses, err.value.status, scraper.archive
+
+    responses, missing_status, archive = asyncio.run(asyncio.wait_for(replay(), 5))
+    # Repeated requests replay in order, then the last response is reused
+    assert responses == ["visit 1", "visit 2", "visit 2", {'echo': 'b'}, {'echo': 'a'}]
+    assert missing_status == 404
+    assert (archive.replayed, archive.missing) == (5, 1)
+
+
+def test_archive_injected_errors_are_deterministic(tmp_path):
+    path = str(tmp_path / "responses.jsonl.gz")
+    recorder = ResponseArchive(path, mode='record')
+    for n in range(40):
+        recorder.record('GET', f"https://shop.test/p/{n}", None, 200, {'Content-Type': 'text/html'}, b"ok")
+    recorder.save()
+
+    def statuses(seed):
+        archive = ResponseArchive(path, error_rate=0.5, seed=seed)
+
+        async def main():
+            return [(await archive.replay('GET', f"https://shop.test/p/{n}", None))[0] for n in range(40)]
+        return asyncio.run(main()), archive.injected_errors
+
+    first, errors = statuses(seed=7)
+    assert set(first) == {200, 503} and errors == first.count(503)
+    assert statuses(seed=7)[0] == first
+    assert statuses(seed=8)[0] != first
+
+
+def test_archive_rejects_unknown_modes(tmp_path):
+    with pytest.raises(ValueError):
+        ResponseArchive(str(tmp_path / "x.gz"), mode='stream')
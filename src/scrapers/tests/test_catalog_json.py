@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from src.scrapers import catalog_json
+
+SAMPLE = {
+    "bullpadel-vertex-04-2024": {
+        "id": "bullpadel-vertex-04-2024",
+        "brand": "Bullpadel",
+        "model": "Vertex 04 Híbrida – Edición Señora 🎾",
+        "description": "Línea \"Pro\"\nsegunda línea\tcon tab y \\ barra",
+        "specs": {"Forma": "Lágrima", "Núcleo": "MultiEVA"},
+        "images": [],
+        "prices": [
+            {"store": "padelmarket", "price": 189.95, "original_price": None,
+             "currency": "EUR", "last_updated": "2026-10-01T10:00:00"},
+            {"store": "padelnuestro", "price": 200, "original_price": 259.9,
+             "discount": 0.1, "stock": True, "rank": -3, "tiny": 0.000123},
+        ],
+    },
+    "empty": {"specs": {}, "images": [], "prices": [], "nested": [[], {}, [{}]]},
+    "ünïcode-ключ": {"model": "日本語", "price": 0.0},
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(catalog_json, "orjson", None)
+    elif catalog_json.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_dumps_matches_json_dump(backend):
+    expected = json.dumps(SAMPLE, indent=4, ensure_ascii=False).encode("utf-8")
+    assert catalog_json.dumps(SAMPLE) == expected
+
+
+def test_compact_round_trip(backend):
+    out = catalog_json.dumps(SAMPLE, compact=True)
+    assert b"\n" not in out
+    assert catalog_json.loads(out) == SAMPLE
+
+
+def test_dump_load_round_trip(backend, tmp_path):
+    path = tmp_path / "rackets.json"
+    catalog_json.dump(SAMPLE, str(path))
+    with open(path, "rb") as f:
+        assert f.read() == json.dumps(SAMPLE, indent=4, ensure_ascii=False).encode("utf-8")
+    assert catalog_json.load(str(path)) == SAMPLE
+
+
+def test_reindent_deep_nesting(backend):
+    data = {"a": [{"b": [{"c": [1, {"d": []}]}]}]}
+    assert catalog_json.dumps(data) == json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+
+
+def test_falls_back_to_json_for_unsupported_values(backend):
+    data = {"big": 2 ** 70, "items": []}
+    assert catalog_json.dumps(data) == json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8")
+
+
+def test_dump_is_atomic(tmp_path, monkeypatch):
+    path = tmp_path / "rackets.json"
+    catalog_json.dump({"old": 1}, str(path))
+    path.chmod(0o640)
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(catalog_json.os, "replace", fail)
+    with pytest.raises(OSError):
+        catalog_json.dump(SAMPLE, str(path))
+    assert json.loads(path.read_text(encoding="utf-8")) == {"old": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["rackets.json"]
+
+    monkeypatch.undo()
+    catalog_json.dump(SAMPLE, str(path))
+    assert catalog_json.load(str(path)) == SAMPLE
+    assert path.stat().st_mode & 0o777 == 0o640
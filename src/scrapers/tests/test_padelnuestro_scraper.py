@@ -0,0 +1,140 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from src.scrapers.padelnuestro_scraper import PadelNuestroScraper
+
+
+def graphql_item(url_key, name, final, regular=None, manufacturer="101", **attributes):
+    return {
+        "name": name,
+        "url_key": url_key,
+        "description": {"html": ""},
+        "small_image": {"url": f"https://media.test/{url_key}-small.jpg?width=200"},
+        "media_gallery": [
+            {"url": f"https://media.test/{url_key}.jpg?width=800"},
+            {"url": f"https://media.test/{url_key}.jpg?width=1600"},
+        ],
+        "manufacturer": manufacturer,
+        "price_range": {"minimum_price": {
+            "regular_price": {"value": regular if regular is not None else final},
+            "final_price": {"value": final},
+        }},
+        **attributes,
+    }
+
+
+CATEGORY_PAGES = {
+    1: [
+        graphql_item("pala-nox-at10-genius-18k-2025", "Pala Nox AT10 Genius 18K 2025", 249.95, 319.95,
+                     padelracket_shape=2225, padelracket_hardness=2211),
+        graphql_item("pala-xtreme-power-2025", "Xtreme Power 2025", 99.0, manufacturer="999"),
+    ],
+    2: [
+        graphql_item("pala-nox-at10-junior", "Pala Nox AT10 Junior", 59.0),
+        graphql_item("paletero-nox-at10", "Paletero Nox AT10", 69.0),
+    ],
+    3: [
+        graphql_item("pala-bullpadel-vertex-04-2025", "Pala Bullpadel Vertex 04 2025", 189.0,
+                     manufacturer="102", media_gallery=[]),
+    ],
+}
+# Not listed in the category any more, but still sold
+DELISTED = {
+    "pala-siux-diablo-2023": graphql_item("pala-siux-diablo-2023", "Pala Siux Diablo 2023", 120.0,
+                                          manufacturer="103"),
+    "pala-head-delta-pro-2023": graphql_item("pala-head-delta-pro-2023", "Pala Head Delta Pro 2023", 110.0),
+}
+
+
+class StubGraphQL:
+    """Answers the scraper's GraphQL queries from CATEGORY_PAGES/DELISTED and records them."""
+
+    def __init__(self, scraper):
+        self.category_pages = []
+        self.url_key_batches = []
+        scraper._fetch_graphql = self.fetch
+
+    async def fetch(self, query):
+        if "customAttributeMetadata" in query:
+            options = [{"value": "101", "label": "Nox"}, {"value": "102", "label": "Bullpadel"},
+                       {"value": "103", "label": "Siux"}]
+            return {"data": {"customAttributeMetadata": {"items": [{"attribute_options": options}]}}}
+        page = int(re.search(r"currentPage: (\d+)", query).group(1))
+        keys = re.search(r"url_key: \{in: (\[.*?\])\}", query)
+        if keys:
+            batch = json.loads(keys.group(1))
+            self.url_key_batches.append(batch)
+            items = [DELISTED[key] for key in batch if key in DELISTED]
+            total_pages = 1
+        else:
+            self.category_pages.append(page)
+            items = CATEGORY_PAGES.get(page, [])
+            total_pages = len(CATEGORY_PAGES)
+        return {"data": {"products": {
+            "total_count": len(items),
+            "page_info": {"current_page": page, "total_pages": total_pages},
+            "items": items,
+        }}}
+
+
+def test_graphql_catalog_parses_prices_images_specs_and_brands():
+    scraper = PadelNuestroScraper()
+    stub = StubGraphQL(scraper)
+
+    products = asyncio.run(scraper.scrape_catalog("https://www.padelnuestro.com/palas-padel"))
+
+    assert sorted(stub.category_pages) == [1, 2, 3]
+    # Junior rackets and accessories are dropped
+    by_key = {p.url.rsplit("/", 1)[-1]: p for p in products}
+    assert list(by_key) == ["pala-nox-at10-genius-18k-2025", "pala-xtreme-power-2025",
+                            "pala-bullpadel-vertex-04-2025"]
+
+    at10 = by_key["pala-nox-at10-genius-18k-2025"]
+    assert at10.url == "https://www.padelnuestro.com/pala-nox-at10-genius-18k-2025"
+    assert (at10.price, at10.original_price, at10.brand) == (249.95, 319.95, "Nox")
+    assert at10.images == ["https://media.test/pala-nox-at10-genius-18k-2025.jpg"]
+    assert (at10.specs["Forma"], at10.specs["Dureza"]) == ("Lágrima", "Media")
+
+    # No discount: no original price. Unknown manufacturer: brand guessed from the name
+    xtreme = by_key["pala-xtreme-power-2025"]
+    assert (xtreme.original_price, xtreme.brand) == (None, "Xtreme")
+    # Empty gallery: falls back to the small image
+    assert by_key["pala-bullpadel-vertex-04-2025"].images == [
+        "https://media.test/pala-bullpadel-vertex-04-2025-small.jpg"
+    ]
+
+
+def test_price_feed_resolves_delisted_urls_in_url_key_batches(capsys):
+    scraper = PadelNuestroScraper()
+    scraper._URL_KEY_BATCH = 2
+    stub = StubGraphQL(scraper)
+    known = [
+        "https://www.padelnuestro.com/pala-nox-at10-genius-18k-2025",
+        "https://www.padelnuestro.com/pala-siux-diablo-2023.html",
+        "https://www.padelnuestro.com/pala-head-delta-pro-2023?utm=feed",
+        "https://www.padelnuestro.com/pala-gone-2019",
+    ]
+
+    feed = asyncio.run(scraper.fetch_price_feed("https://www.padelnuestro.com/palas-padel", known))
+
+    assert stub.url_key_batches == [["pala-siux-diablo-2023", "pala-head-delta-pro-2023"], ["pala-gone-2019"]]
+    assert [scraper.price_feed_key(url) in feed for url in known] == [True, True, True, False]
+    assert feed["pala-siux-diablo-2023"].brand == "Siux"
+    assert feed["pala-head-delta-pro-2023"].price == 110.0
+    assert "junior" not in capsys.readouterr().out.lower()
+
+
+@pytest.mark.parametrize("name, brand", [
+    ("Pala Nox AT10 Genius 18K 2025", "Nox"),
+    ("PALA BULLPADEL VERTEX 04", "Bullpadel"),
+    ("Pala Drop Shot Explorer Pro", "Drop Shot"),
+    ("Pala Eme Lux 2024", "Eme"),
+    # "Eme" and "Head" only count as whole words
+    ("Pala Xtreme Carbon 2024", "Pala"),
+    ("Headway Pro Pala", "Headway"),
+])
+def test_brand_from_name_matches_whole_words(name, brand):
+    assert PadelNuestroScraper()._brand_from_name(name) == brand
@@ -0,0 +1,388 @@
+import json
+import random
+import threading
+
+import pytest
+from thefuzz import fuzz as thefuzz
+
+from src.scrapers.base_scraper import Product
+from src.scrapers.racket_manager import CatalogLoadError, RacketManager
+
+
+_FEATURES = {}
+
+
+def extract(manager: RacketManager, name: str) -> dict:
+    # Memoized only to keep the quadratic reference scan fast
+    if name not in _FEATURES:
+        _FEATURES[name] = manager._extract_features(name)
+    return _FEATURES[name]
+
+
+def linear_scan(manager: RacketManager, name: str, brand: str):
+    """The original matcher: fingerprint and fuzz every catalog entry in order."""
+    input_features = extract(manager, name)
+    best_score = 0
+    best_match_slug = None
+    for existing_slug, data in manager.data.items():
+        existing_brand = data.get('brand', 'Unknown')
+        if existing_brand == "Unknown":
+            existing_brand = manager._detect_brand_from_name(data['model'])
+        if existing_brand.lower() != brand.lower():
+            continue
+        existing_model = data.get('model', '')
+        if not isinstance(existing_model, str) or not existing_model:
+            continue
+        existing_features = extract(manager, existing_model)
+        if not manager._are_compatible(input_features, existing_features):
+            continue
+        score = thefuzz.token_sort_ratio(input_features['clean_name'], existing_features['clean_name'])
+        if input_features['year'] and input_features['year'] == existing_features['year']:
+            score += 5
+        if score > 88 and score > best_score:
+            best_score = score
+            best_match_slug = existing_slug
+    return best_match_slug
+
+
+WORDS = [
+    "vertex", "delta", "speed", "gravity", "extreme", "radical", "alpha", "hack",
+    "neuron", "metalbone", "coello", "tempo", "ignite", "storm", "arrow", "blaze",
+    "galan", "ale", "tapia", "lebron", "chingotto", "stupa", "paquito", "sanyo",
+]
+SUFFIXES = ["", "", "", "woman", "light", "pro", "ctrl", "12k"]
+YEARS = ["2023", "2024", "2025", "", ""]
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice("aeiourst") + word[i + 1:]
+
+
+def corpus(seed: int, size: int):
+    """Names with shared stems, player names, typos and years.
+
+    Most products are Nox without suffixes, so that block grows well past
+    PRESELECT_MIN_BLOCK; typo variants share no token with their original.
+    """
+    rng = random.Random(seed)
+    stems = [" ".join(rng.sample(WORDS, rng.randint(2, 3))) for _ in range(size // 4)]
+    products = []
+    for i in range(size):
+        brand = "Nox" if rng.random() < 0.7 else rng.choice(["Wilson", "Head", "Unknown"])
+        stem = rng.choice(stems)
+        if rng.random() < 0.3:
+            stem = " ".join(_typo(w, rng) for w in stem.split())
+        suffix = "" if brand == "Nox" else rng.choice(SUFFIXES)
+        label = "Siux" if brand == "Unknown" else brand
+        name = " ".join(p for p in ["Pala", label, stem, suffix, rng.choice(YEARS)] if p)
+        products.append(Product(
+            url=f"https://store.test/{i}", name=name, price=100.0 + i, brand=brand,
+            image="", specs={},
+        ))
+    return products
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matcher_agrees_with_linear_scan(tmp_path, seed):
+    manager = RacketManager(str(tmp_path / "rackets.json"))
+    preselect_misses = 0
+    for product in corpus(seed, 1000):
+        prepared = manager._prepare_product(product)
+        if prepared is None:
+            continue
+        known = set(manager.data)
+        expected = linear_scan(manager, prepared["name"], prepared["brand"])
+
+        if manager._index_ready and expected:
+            candidates = manager._candidates(prepared["brand"], prepared["features"])
+            if (len(candidates) > RacketManager.PRESELECT_MIN_BLOCK
+                    and expected not in manager._preselect(candidates, prepared["features"])):
+                preselect_misses += 1
+
+        slug = manager.merge_product(product, "padelmarket")
+        if expected:
+            assert slug == expected, product.name
+        else:
+            assert slug not in known, product.name
+
+    # The corpus must exercise matches that the token preselect alone would miss
+    assert preselect_misses > 0
+
+
+def test_ties_go_to_the_oldest_entry(tmp_path):
+    manager = RacketManager(str(tmp_path / "rackets.json"))
+    # The 2025 year bucket of the block is created before the no-year one
+    manager.data = {
+        "wilson-vertex-woman-2025": {"brand": "Wilson", "model": "Wilson Vertex Woman 2025",
+                                     "images": [], "prices": [], "specs": {}},
+        "wilson-delta-woman-ale-galan": {"brand": "Wilson", "model": "Wilson Delta Woman Galan",
+                                         "images": [], "prices": [], "specs": {}},
+        "wilson-delta-woman-2025": {"brand": "Wilson", "model": "Wilson Delta Woman 2025",
+                                    "images": [], "prices": [], "specs": {}},
+    }
+    product = Product(url="https://store.test/w", name="Wilson delta woman", price=1.0,
+                      brand="Wilson", image="", specs={})
+    expected = linear_scan(manager, manager._prepare_product(product)["name"], "Wilson")
+    assert expected == "wilson-delta-woman-ale-galan"
+    assert manager.merge_product(product, "padelmarket") == expected
+
+
+def _product(i: int, name: str = "Nox AT10 Genius 18K 2025", brand: str = "Nox") -> Product:
+    return Product(url=f"https://store.test/{i}", name=name, price=100.0 + i, brand=brand,
+                   image="", specs={})
+
+
+def _catalog(tmp_path, models) -> RacketManager:
+    """RacketManager over a rackets.json holding {slug: (brand, model)}, in order."""
+    path = tmp_path / "rackets.json"
+    path.write_text(json.dumps({
+        slug: {"id": slug, "brand": brand, "model": model, "description": "", "specs": {}, "images": [],
+               "prices": [{"store": "padelmarket", "price": 100.0, "url": f"https://padelmarket.test/{slug}"}]}
+        for slug, (brand, model) in models.items()
+    }), encoding="utf-8")
+    return RacketManager(str(path))
+
+
+CATALOG = {
+    "nox-at10-genius-2025": ("Nox", "nox at10 genius 2025"),
+    "nox-at10-genius-2024": ("Nox", "nox at10 genius 2024"),
+    "nox-at10-genius-woman-2025": ("Nox", "nox at10 genius woman 2025"),
+    "nox-at10-genius": ("Nox", "nox at10 genius"),
+    "siux-diablo-2024": ("Unknown", "siux diablo 2024"),
+    "bullpadel-vertex-04-2025": ("Bullpadel", "bullpadel vertex 04 2025"),
+}
+
+
+def test_blocking_index_limits_candidates_to_brand_suffixes_and_year(tmp_path):
+    manager = _catalog(tmp_path, CATALOG)
+    # Built on the first merge only
+    assert not manager._index_ready
+    assert manager.merge_product(_product(1, "Nox AT10 Genius 2025"), "padelnuestro") == "nox-at10-genius-2025"
+    assert manager._index_ready
+
+    def candidates(brand, name):
+        return manager._candidates(brand, manager._extract_features(name))
+
+    # Same year or no year; catalog order
+    assert candidates("Nox", "nox at10 genius 2025") == ["nox-at10-genius-2025", "nox-at10-genius"]
+    assert candidates("Nox", "nox at10 genius") == ["nox-at10-genius-2025", "nox-at10-genius-2024",
+                                                    "nox-at10-genius"]
+    assert candidates("Nox", "nox at10 genius woman 2025") == ["nox-at10-genius-woman-2025"]
+    assert candidates("NOX", "nox at10 genius 2023") == ["nox-at10-genius"]
+    # Entries stored as "Unknown" are blocked under the brand found in their model
+    assert candidates("Siux", "siux diablo 2024") == ["siux-diablo-2024"]
+    assert candidates("Head", "head speed pro 2025") == []
+
+    # New entries join their block as soon as they are created
+    slug = manager.merge_product(_product(2, "Nox ML10 Pro Cup 2025"), "padelnuestro")
+    assert slug not in CATALOG
+    assert candidates("Nox", "nox ml10 pro cup") == [slug]
+    assert manager.merge_product(_product(3, "Nox AT10 Genius Woman 2025"), "padelproshop") == \
+        "nox-at10-genius-woman-2025"
+
+
+def test_catalog_fingerprints_are_computed_once_per_model(tmp_path, monkeypatch):
+    manager = _catalog(tmp_path, CATALOG)
+    fingerprinted = []
+    extract_features = manager._extract_features
+
+    def counting(name):
+        fingerprinted.append(name)
+        return extract_features(name)
+
+    monkeypatch.setattr(manager, "_extract_features", counting)
+    manager.merge_product(_product(1, "Nox AT10 Genius 2024"), "padelnuestro")
+    # The catalog once (on the first merge), then only the incoming name
+    assert len(fingerprinted) == len(CATALOG) + 1
+
+    fingerprinted.clear()
+    manager.merge_product(_product(2, "Bullpadel Vertex 04 2025", "Bullpadel"), "padelnuestro")
+    manager.merge_product(_product(3, "Nox AT10 Genius Woman 2025"), "padelnuestro")
+    assert fingerprinted == ["bullpadel vertex 04 2025", "nox at10 genius woman 2025"]
+    # A URL already in the catalog is merged without fingerprinting
+    fingerprinted.clear()
+    manager.merge_product(_product(2, "Bullpadel Vertex 04 2025", "Bullpadel"), "padelnuestro")
+    assert fingerprinted == []
+
+    # Adopting a name with a year re-fingerprints that entry only
+    fingerprinted.clear()
+    assert manager.merge_product(_product(4, "Nox AT10 Genius 2023"), "padelnuestro") == "nox-at10-genius"
+    assert manager.data["nox-at10-genius"]["model"] == "nox at10 genius 2023"
+    assert fingerprinted == ["nox at10 genius 2023", "nox at10 genius 2023"]
+    assert manager._fingerprint("nox-at10-genius")["year"] == "2023"
+
+    # A model edited in place is re-fingerprinted when its old block is next
+    # looked up, and moves to its new block
+    manager.data["nox-at10-genius-2024"]["model"] = "nox at10 genius woman 2024"
+    fingerprinted.clear()
+    assert manager.merge_product(_product(5, "Nox AT10 Genius 2024"), "padelproshop") != "nox-at10-genius-2024"
+    assert "nox at10 genius woman 2024" in fingerprinted
+    fingerprinted.clear()
+    slug = manager.merge_product(_product(6, "Nox AT10 Genius Woman 2024"), "padelproshop")
+    assert slug == "nox-at10-genius-2024"
+    assert fingerprinted == ["nox at10 genius woman 2024"]
+
+
+def test_concurrent_merge_batches_match_sequential_merges(tmp_path):
+    stores = ["padelmarket", "padelnuestro", "padelproshop", "padelzoom"]
+    # Distinct stems, all with a year: which entry a name lands on must not
+    # depend on the order the stores' products arrive in
+    rng = random.Random(5)
+    stems = []
+    while len(stems) < 50:
+        stem = "".join(rng.choice("bcdfgklmnprstvz") + rng.choice("aeiou") for _ in range(4))
+        if all(thefuzz.ratio(stem, other) < 50 for other in stems):
+            stems.append(stem)
+    names = [f"{brand} {stem} {year}" for brand in ("Nox", "Wilson", "Head") for stem in stems
+             for year in ("2024", "2025")]
+
+    def listing(store):
+        return [Product(url=f"https://{store}.test/{i}", name=name, price=100.0 + i, brand=name.split()[0],
+                        image="", specs={}) for i, name in enumerate(names)]
+
+    sequential = RacketManager(str(tmp_path / "sequential.json"))
+    for store in stores:
+        for product in listing(store):
+            sequential.merge_product(product, store)
+    assert len(sequential.data) == len(names)
+
+    concurrent = RacketManager(str(tmp_path / "concurrent.json"))
+    start = threading.Barrier(len(stores))
+    results = {}
+
+    def worker(store):
+        products = listing(store)
+        start.wait()
+        # Small batches, so the threads interleave inside the catalog
+        results[store] = [slug for i in range(0, len(products), 10)
+                          for slug in concurrent.merge_products(products[i:i + 10], store)]
+
+    threads = [threading.Thread(target=worker, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    def prices(manager):
+        return {slug: sorted((p["store"], p["price"], p["url"]) for p in racket["prices"])
+                for slug, racket in manager.data.items()}
+
+    # Every store lists the same rackets: all four land on the same entries
+    assert len(set(map(tuple, results.values()))) == 1
+    assert len(concurrent.data) == len(names)
+    assert set(concurrent.data) == set(sequential.data)
+    assert prices(concurrent) == prices(sequential)
+    assert concurrent.verify_url_map() == []
+
+
+def test_merge_products_keeps_order_and_skips_packs(tmp_path):
+    manager = RacketManager(str(tmp_path / "rackets.json"))
+    slugs = manager.merge_products([
+        _product(1, "Nox AT10 Genius 2025"),
+        _product(2, "Pack Nox AT10 Genius 2025 + Paletero"),
+        _product(3, "Nox ML10 Pro Cup 2025"),
+        _product(4, "Nox AT10 Genius 2025"),
+    ], "padelmarket")
+    assert slugs[1] is None
+    assert slugs[0] == slugs[3] != slugs[2]
+    snapshot = manager.snapshot([slugs[0], "missing"])
+    assert list(snapshot) == [slugs[0]]
+    # Deep copies: editing a snapshot leaves the catalog alone
+    snapshot[slugs[0]]["prices"].clear()
+    assert manager.get_price(slugs[0], "padelmarket")["url"] == "https://store.test/4"
+
+
+def test_price_index_points_at_the_stored_price_entries(tmp_path):
+    manager = _catalog(tmp_path, CATALOG)
+    slug = "nox-at10-genius-2025"
+    entry = manager.get_price(slug, "padelmarket")
+    assert entry is manager.data[slug]["prices"][0]
+    assert manager.prices_by_store(slug) == {"padelmarket": entry}
+    assert manager.get_price(slug, "padelnuestro") is None
+    assert manager.prices_by_store("missing") == {} and manager.get_price("missing", "padelmarket") is None
+
+    # Same values: nothing to save
+    manager.set_price(slug, "padelmarket", price=100.0)
+    assert not manager.dirty
+    # Updates edit the entry in place; new stores are appended
+    manager.set_price(slug, "padelmarket", price=89.95)
+    added = manager.set_price(slug, "padelnuestro", price=92.0, url="https://padelnuestro.test/at10")
+    assert manager.dirty == {slug}
+    assert [p["store"] for p in manager.data[slug]["prices"]] == ["padelmarket", "padelnuestro"]
+    assert manager.data[slug]["prices"][0]["price"] == 89.95 and manager.data[slug]["prices"][1] is added
+
+    # A second listing from the same store replaces its entry rather than adding one
+    manager.merge_product(Product(url="https://padelnuestro.test/at10-v2", name="Nox AT10 Genius 2025",
+                                  price=90.0, brand="Nox", image="", specs={}), "padelnuestro")
+    prices = [(p["store"], p["price"]) for p in manager.data[slug]["prices"]]
+    assert prices == [("padelmarket", 89.95), ("padelnuestro", 90.0)]
+
+    # rackets.json keeps the list form, in insertion order
+    manager.save_db()
+    stored = json.loads((tmp_path / "rackets.json").read_text(encoding="utf-8"))[slug]["prices"]
+    assert [(p["store"], p["price"]) for p in stored] == [("padelmarket", 89.95), ("padelnuestro", 90.0)]
+    reloaded = RacketManager(str(tmp_path / "rackets.json"))
+    assert reloaded.get_price(slug, "padelnuestro")["url"] == "https://padelnuestro.test/at10-v2"
+
+
+def test_url_map_follows_price_url_changes(tmp_path):
+    manager = _catalog(tmp_path, CATALOG)
+    at10, vertex = "nox-at10-genius-2025", "bullpadel-vertex-04-2025"
+    old_url, new_url = "https://padelmarket.test/nox-at10-genius-2025", "https://padelmarket.test/at10-new"
+
+    manager.set_price(at10, "padelmarket", url=new_url)
+    assert manager.url_map[new_url] == at10 and old_url not in manager.url_map
+    # A product listed under the new URL is matched by it, whatever its name
+    renamed = Product(url=new_url, name="Nox Pala AT10 Edición Especial", price=80.0, brand="Nox",
+                      image="", specs={})
+    assert manager.merge_product(renamed, "padelmarket") == at10
+
+    # Another racket taking the URL over owns it; the old owner moving away
+    # does not release it
+    manager.set_price(vertex, "padelmarket", url=new_url)
+    assert manager.url_map[new_url] == vertex
+    manager.set_price(at10, "padelmarket", url=old_url)
+    assert manager.url_map[new_url] == vertex and manager.url_map[old_url] == at10
+    assert manager.verify_url_map() == []
+
+
+def test_check_url_map_repairs_drift_on_save(tmp_path, capsys):
+    manager = _catalog(tmp_path, CATALOG)
+    manager.check_url_map = True
+    manager.url_map["https://padelmarket.test/stale"] = "nox-at10-genius-2025"
+    del manager.url_map["https://padelmarket.test/siux-diablo-2024"]
+    assert sorted(manager.verify_url_map()) == ["https://padelmarket.test/siux-diablo-2024",
+                                                "https://padelmarket.test/stale"]
+    assert manager.save_db(force=True)
+    assert "url_map out of sync for 2 URLs" in capsys.readouterr().out
+    assert manager.verify_url_map() == []
+
+
+def test_save_skips_unchanged_catalog(tmp_path):
+    path = tmp_path / "rackets.json"
+    manager = RacketManager(str(path))
+    manager.merge_product(_product(1), "padelmarket")
+    assert manager.save_db() is True
+    before = path.read_bytes()
+    path.write_bytes(b"{}")  # sentinel: a write would replace it
+
+    reloaded = RacketManager(str(path))
+    assert reloaded.save_db() is False
+    assert path.read_bytes() == b"{}"
+
+    path.write_bytes(before)
+    reloaded = RacketManager(str(path))
+    reloaded.merge_product(_product(2), "padelnuestro")
+    assert reloaded.dirty
+    assert reloaded.save_db() is True
+    assert reloaded.save_db() is False
+    assert reloaded.save_db(force=True) is True
+
+
+def test_corrupt_catalog_is_not_overwritten(tmp_path):
+    path = tmp_path / "rackets.json"
+    path.write_text('{"nox-at10": {"model": ', encoding="utf-8")
+    with pytest.raises(CatalogLoadError):
+        RacketManager(str(path))
+    assert path.read_text(encoding="utf-8") == '{"nox-at10": {"model": '
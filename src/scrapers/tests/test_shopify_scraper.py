@@ -0,0 +1,166 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.scrapers import sync_catalog
+from src.scrapers.base_scraper import Product
+from src.scrapers.padelmarket_scraper import PadelMarketScraper
+from src.scrapers.padelproshop_scraper import PadelProShopScraper
+
+
+def shopify_product(handle, title, price, compare_at=None, vendor="Nox", body_html=""):
+    return {
+        "handle": handle,
+        "title": title,
+        "vendor": vendor,
+        "body_html": body_html,
+        "variants": [{"price": str(price), "compare_at_price": compare_at}],
+        "images": [{"src": f"https://cdn.test/{handle}-1.jpg"}, {"src": f"https://cdn.test/{handle}-2.jpg"}],
+    }
+
+
+DIAMOND = "<ul><li><strong>Forma:</strong> Diamante</li><li><strong>Peso:</strong> 360-375 gr</li></ul>"
+
+PAGES = {
+    1: [
+        shopify_product("nox-at10-genius-18k-2025", "Nox AT10 Genius 18K 2025", "279.95", "329.95",
+                        body_html=DIAMOND),
+        shopify_product("bullpadel-vertex-04-2025", "Bullpadel Vertex 04 2025", "199.00", vendor="Bullpadel"),
+        shopify_product("nox-at10-junior", "Nox AT10 Junior", "89.00"),
+    ],
+    2: [
+        # Listed again on a later page: kept once
+        shopify_product("nox-at10-genius-18k-2025", "Nox AT10 Genius 18K 2025", "279.95", "329.95",
+                        body_html=DIAMOND),
+        shopify_product("head-speed-pro-2025", "Head Speed Pro 2025", "not a price", vendor="Head"),
+    ],
+}
+
+
+class StubFetches:
+    """Serves PAGES as products.json pages and records every request."""
+
+    def __init__(self, scraper, pages=PAGES, product_page="<li><strong>Forma:</strong> Redonda</li>"):
+        self.api_pages = []
+        self.html_urls = []
+        self.pages = pages
+        self.product_page = product_page
+        scraper.fetch_json = self.fetch_json
+        scraper.fetch_text = self.fetch_text
+
+    async def fetch_json(self, url, headers=None, timeout=None):
+        parsed = urlparse(url)
+        assert parsed.path.endswith("/products.json")
+        page = int(parse_qs(parsed.query)["page"][0])
+        self.api_pages.append((parsed.netloc + parsed.path, page))
+        return {"products": self.pages.get(page, [])}
+
+    async def fetch_text(self, url, headers=None, timeout=None):
+        self.html_urls.append(url)
+        return self.product_page
+
+
+def test_bulk_catalog_builds_products_from_collection_pages():
+    scraper = PadelMarketScraper()
+    fetches = StubFetches(scraper)
+
+    products = asyncio.run(scraper.scrape_catalog("https://padelmarket.com/es-eu/collections/palas"))
+
+    by_name = {p.name: p for p in products}
+    assert list(by_name) == ["Nox AT10 Genius 18K 2025", "Bullpadel Vertex 04 2025", "Head Speed Pro 2025"]
+    at10 = by_name["Nox AT10 Genius 18K 2025"]
+    assert at10.url == "https://padelmarket.com/es-eu/products/nox-at10-genius-18k-2025"
+    assert (at10.price, at10.original_price, at10.brand) == (279.95, 329.95, "Nox")
+    assert at10.images == ["https://cdn.test/nox-at10-genius-18k-2025-1.jpg",
+                           "https://cdn.test/nox-at10-genius-18k-2025-2.jpg"]
+    assert at10.image == at10.images[0]
+    assert at10.specs["Forma"] == "Diamante"
+    assert by_name["Head Speed Pro 2025"].price == 0.0
+
+    # The first window of pages stops at the first empty one
+    assert {page for _, page in fetches.api_pages} == {1, 2, 3, 4}
+    assert {path for path, _ in fetches.api_pages} == {"padelmarket.com/es-eu/collections/palas/products.json"}
+    # Only the products whose body_html lacks the shape fetch their page
+    assert sorted(fetches.html_urls) == [
+        "https://padelmarket.com/es-eu/products/bullpadel-vertex-04-2025",
+        "https://padelmarket.com/es-eu/products/head-speed-pro-2025",
+    ]
+    assert by_name["Bullpadel Vertex 04 2025"].specs["Forma"] == "Redonda"
+
+
+def test_bulk_catalog_honours_the_limit():
+    scraper = PadelMarketScraper()
+    StubFetches(scraper)
+    products = asyncio.run(scraper.scrape_catalog("https://padelmarket.com/es-eu/collections/palas", limit=1))
+    assert [p.name for p in products] == ["Nox AT10 Genius 18K 2025"]
+
+
+@pytest.mark.parametrize("scraper_class, url, products_json, product_url", [
+    (PadelMarketScraper, "https://padelmarket.com/es-eu/collections/palas",
+     "padelmarket.com/es-eu/collections/palas/products.json",
+     "https://padelmarket.com/es-eu/products/bullpadel-vertex-04-2025"),
+    (PadelProShopScraper, "https://padelproshop.com/collections/palas-padel",
+     "padelproshop.com/collections/palas-padel/products.json",
+     "https://padelproshop.com/products/bullpadel-vertex-04-2025"),
+])
+def test_category_urls_come_from_the_collection_pages(scraper_class, url, products_json, product_url):
+    scraper = scraper_class()
+    fetches = StubFetches(scraper)
+    urls = asyncio.run(scraper.scrape_category(url))
+    assert len(urls) == 4 and urls[1] == product_url
+    assert {path for path, _ in fetches.api_pages} == {products_json}
+    assert fetches.html_urls == []
+
+
+# ── Price feeds (--mode prices) ────────────────────────────────────────────────
+
+def test_price_feed_prices_the_collection_keyed_by_handle(capsys):
+    scraper = PadelProShopScraper()
+    fetches = StubFetches(scraper)
+
+    feed = asyncio.run(scraper.fetch_price_feed("https://padelproshop.com/collections/palas-padel"))
+
+    assert list(feed) == ["nox-at10-genius-18k-2025", "bullpadel-vertex-04-2025", "head-speed-pro-2025"]
+    at10 = feed[scraper.price_feed_key("https://padelproshop.com/products/nox-at10-genius-18k-2025?variant=1")]
+    assert (at10.price, at10.original_price) == (279.95, 329.95)
+    assert at10.url == "https://padelproshop.com/products/nox-at10-genius-18k-2025"
+    # Prices only: no product pages, and juniors are skipped without a log line each
+    assert fetches.html_urls == []
+    assert "junior" not in capsys.readouterr().out.lower()
+
+
+class FeedOnlyScraper:
+    """Stands in for a store scraper; scrape_product records its calls."""
+
+    concurrency = None
+
+    def __init__(self):
+        self.scraped = []
+
+    def price_feed_key(self, url):
+        return PadelMarketScraper._handle_from_url(url)
+
+    async def scrape_product(self, url):
+        self.scraped.append(url)
+        return Product(url, "Scraped", 150.0, "Nox", "", {})
+
+
+def test_prices_sync_uses_the_feed_and_scrapes_only_unlisted_urls():
+    scraper = FeedOnlyScraper()
+    racket = {"prices": [
+        {"store": "padelmarket", "url": "https://padelmarket.com/es-eu/products/listed", "price": 200.0},
+        {"store": "padelmarket", "url": "https://padelmarket.com/es-eu/products/unlisted", "price": 160.0},
+    ]}
+    feeds = {"padelmarket": {"listed": Product("https://padelmarket.com/es-eu/products/listed",
+                                               "Listed", 180.0, "Nox", "", {}, original_price=220.0)}}
+
+    slug, _, db_updates, changed, info = asyncio.run(sync_catalog._process_single_price(
+        "nox-listed", racket, "Nox Listed", None, {"padelmarket": scraper}, ["padelmarket"], {},
+        {}, None, True, {}, feeds,
+    ))
+
+    assert scraper.scraped == ["https://padelmarket.com/es-eu/products/unlisted"]
+    assert changed and info == ["padelmarket:200.0€→180.0€", "padelmarket:160.0€→150.0€"]
+    # Both entries belong to the same store: the last one wins the column
+    assert db_updates["padelmarket_actual_price"] == 150.0
@@ -0,0 +1,349 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import FakeSupabase
+from src.scrapers import sync_catalog
+from src.scrapers.base_scraper import Product
+from src.scrapers.racket_manager import RacketManager
+
+
+def _racket(slug: str, stores=("padelmarket",), price: float = 100.0) -> dict:
+    return {
+        "id": slug, "brand": "Nox", "model": slug.replace("-", " ").title(),
+        "description": "", "specs": {}, "images": [],
+        "prices": [{"store": s, "price": price, "original_price": None, "url": f"https://{s}.test/{slug}"}
+                   for s in stores],
+    }
+
+
+# ── upsert_rackets_bulk ────────────────────────────────────────────────────────
+
+def test_bulk_upsert_groups_rows_by_columns(fake_supabase):
+    fake_supabase.tables["rackets"] = [{"id": 1, "slug": "old-a"}, {"id": 2, "slug": "old-b"}]
+    slug_id_map = {"old-a": 1, "old-b": 2}
+    rackets = [
+        ("old-a", _racket("old-a")),
+        ("old-b", _racket("old-b", ("padelmarket", "padelnuestro"))),
+        ("new-a", _racket("new-a")),
+        ("new-b", _racket("new-b")),
+        ("new-c", _racket("new-c", ())),
+    ]
+    ids = sync_catalog.upsert_rackets_bulk(fake_supabase, rackets, slug_id_map, dry_run=False, chunk_size=1000)
+
+    # Existing rows: one upsert per column set; new rows: one insert per column set
+    assert fake_supabase.count("rackets", "upsert") == 2
+    assert fake_supabase.count("rackets", "insert") == 2
+    assert set(ids) == {slug for slug, _ in rackets}
+    assert ids["old-a"] == 1 and ids["old-b"] == 2
+    rows = {row["slug"]: row for row in fake_supabase.tables["rackets"]}
+    for slug in ("new-a", "new-b", "new-c"):
+        assert slug_id_map[slug] == ids[slug] == rows[slug]["id"]
+    assert rows["old-b"]["padelnuestro_actual_price"] == 100.0
+
+
+def test_bulk_upsert_respects_chunk_size(fake_supabase):
+    rackets = [(f"new-{i}", _racket(f"new-{i}")) for i in range(7)]
+    sync_catalog.upsert_rackets_bulk(fake_supabase, rackets, {}, dry_run=False, chunk_size=3)
+    assert [n for t, op, n in fake_supabase.calls if op == "insert"] == [3, 3, 1]
+
+
+def test_rejected_chunk_falls_back_to_single_rows(fake_supabase):
+    fake_supabase.tables["rackets"] = [{"id": 1, "slug": "old-a"}, {"id": 2, "slug": "old-b"}]
+    # Reject every multi-row request, and the single row of "bad"
+    fake_supabase.fail = lambda table, op, rows: len(rows) > 1 or rows[0].get("slug") == "bad"
+    slug_id_map = {"old-a": 1, "old-b": 2}
+    rackets = [("old-a", _racket("old-a")), ("old-b", _racket("old-b")), ("new-a", _racket("new-a")),
+               ("new-b", _racket("new-b")), ("bad", _racket("bad"))]
+    synced_hashes = {}
+    ids = sync_catalog.upsert_rackets_bulk(fake_supabase, rackets, slug_id_map, dry_run=False,
+                                           synced_hashes=synced_hashes)
+
+    assert set(ids) == {"old-a", "old-b", "new-a", "new-b"}
+    assert "bad" not in slug_id_map
+    assert fake_supabase.count("rackets", "update") == 2  # old-a and old-b, row by row
+    # Only the rows actually written get a hash
+    assert set(synced_hashes) == {"old-a", "old-b", "new-a", "new-b"}
+
+
+def test_synced_hashes_follow_supabase_changes(fake_supabase):
+    rackets = [("a", _racket("a")), ("b", _racket("b")), ("c", _racket("c"))]
+    slug_id_map, synced_hashes = {}, {}
+    sync_catalog.upsert_rackets_bulk(fake_supabase, rackets, slug_id_map, dry_run=False,
+                                     synced_hashes=synced_hashes)
+
+    def next_run():
+        row_versions = {}
+        slug_id_map = sync_catalog.get_slug_id_map(fake_supabase, row_versions)
+        stale = sync_catalog.reconcile_sync_hashes(synced_hashes, slug_id_map, row_versions)
+        skipped = []
+        fake_supabase.calls.clear()
+        sync_catalog.upsert_rackets_bulk(fake_supabase, rackets, slug_id_map, dry_run=False,
+                                         synced_hashes=synced_hashes, skipped=skipped)
+        return stale, sorted(skipped)
+
+    # Nothing changed on either side: nothing is sent
+    assert next_run() == (0, ["a", "b", "c"])
+    assert fake_supabase.calls == []
+
+    # An admin edit bumps updated_at (PostgREST may trim the fraction), and
+    # deduplication deletes "b": both are written again, "b" as a new row
+    rows = {row["slug"]: row for row in fake_supabase.tables["rackets"]}
+    rows["a"].update(name="Edited", updated_at="2099-01-01T00:00:00.5+00:00")
+    rows["c"]["updated_at"] = rows["c"]["updated_at"].replace("+00:00", "").rstrip("0").rstrip(".") + "Z"
+    fake_supabase.tables["rackets"].remove(rows["b"])
+    assert next_run() == (2, ["c"])
+    rows = {row["slug"]: row for row in fake_supabase.tables["rackets"]}
+    assert rows["a"]["name"] == "A"
+    assert rows["b"]["id"] not in (1, 2, 3)
+    assert next_run() == (0, ["a", "b", "c"])
+
+
+def test_dry_run_writes_nothing(fake_supabase):
+    ids = sync_catalog.upsert_rackets_bulk(fake_supabase, [("a", _racket("a")), ("b", _racket("b"))],
+                                           {"a": 5}, dry_run=True)
+    assert ids == {"a": 5}
+    assert fake_supabase.calls == []
+
+
+# ── merge → persist ────────────────────────────────────────────────────────────
+
+def _full_sync_stages(client, catalog_path, products, chunk_size=sync_catalog.UPSERT_CHUNK_SIZE):
+    """One full sync's merge and persist stages over (store, Product) pairs."""
+    manager = RacketManager(catalog_path)
+    slug_id_map = sync_catalog.get_slug_id_map(client)
+    current_db_prices = sync_catalog.get_current_db_prices(client)
+    totals = {"new": 0, "updated": 0, "unchanged": 0}
+    stats = sync_catalog.PipelineStats()
+    persisted = set()
+
+    async def run():
+        queue = asyncio.Queue()
+        for item in [*products, None]:
+            queue.put_nowait(item)
+        touched = {}
+        seen = {store: set() for store, _ in products}
+        await sync_catalog._merge_stage(manager, queue, touched, seen, stats)
+        untouched = [slug for slug in manager.data if slug not in touched]
+        history = sync_catalog.PriceHistoryBuffer(client, dry_run=False)
+        await sync_catalog._persist_stage(
+            list(touched) + untouched, manager, slug_id_map, current_db_prices, False, persisted,
+            totals, stats, chunk_size, price_history=history,
+        )
+
+    asyncio.run(run())
+    manager.save_db()
+    return persisted
+
+
+def test_persist_writes_only_the_final_merged_state(fake_supabase, monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_catalog, "supabase", fake_supabase)
+    name = "Nox AT10 Genius 18K 2025"
+    products = [
+        # The same racket listed twice by one store, and once by another
+        ("padelmarket", Product("https://padelmarket.test/at10", name, 200.0, "Nox", "", {})),
+        ("padelmarket", Product("https://padelmarket.test/at10-alt", name, 180.0, "Nox", "", {})),
+        ("padelnuestro", Product("https://padelnuestro.test/at10", name, 190.0, "Nox", "", {})),
+    ]
+    catalog = str(tmp_path / "rackets.json")
+
+    assert len(_full_sync_stages(fake_supabase, catalog, products)) == 1
+    [row] = fake_supabase.tables["rackets"]
+    assert (row["padelmarket_actual_price"], row["padelnuestro_actual_price"]) == (180.0, 190.0)
+    history = [(h["store"], h["price"]) for h in fake_supabase.tables["price_history"]]
+    assert sorted(history) == [("padelmarket", 180.0), ("padelnuestro", 190.0)]
+    assert [op for _, op, _ in fake_supabase.calls if op != "select"] == ["insert", "insert"]
+
+    # Nothing changed upstream: no new history rows, one write of the racket
+    fake_supabase.calls.clear()
+    _full_sync_stages(fake_supabase, catalog, products)
+    assert len(fake_supabase.tables["price_history"]) == 2
+    assert [op for _, op, _ in fake_supabase.calls if op != "select"] == ["upsert"]
+
+
+def test_persist_sends_full_chunks_for_products_emitted_one_by_one(fake_supabase, monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_catalog, "supabase", fake_supabase)
+    catalog = str(tmp_path / "rackets.json")
+
+    def listed(*models):
+        return [("padelmarket", Product(f"https://padelmarket.test/{model}", f"Nox {model} 2025",
+                                        150.0, "Nox", "", {})) for model in models]
+
+    _full_sync_stages(fake_supabase, catalog, listed("AT10", "ML10"))
+
+    batches = []
+    persist_rackets = sync_catalog._persist_rackets
+
+    def record(client, rackets, *args):
+        batches.append([slug for slug, _ in rackets])
+        return persist_rackets(client, rackets, *args)
+
+    monkeypatch.setattr(sync_catalog, "_persist_rackets", record)
+    # Per-URL mode hands the merger one product at a time; the rackets not
+    # seen this run still go out in the same full chunks
+    persisted = _full_sync_stages(fake_supabase, catalog, listed("X-One", "X-Zero", "Equation", "Tempo", "VK10"),
+                                  chunk_size=3)
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert batches[-1] == ["nox-ml10-2025"] and batches[1][-1] == "nox-at10-2025"
+    assert len(persisted) == 7
+
+
+class CatalogStub:
+    """Store scraper whose catalog only returns once every store has started scraping."""
+
+    supports_bulk_catalog = True
+    concurrency = None
+
+    def __init__(self, store, started, stores, products, fail=False):
+        self.store, self.started, self.stores = store, started, stores
+        self.products, self.fail = products, fail
+        self.closed = False
+
+    async def init(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    async def scrape_catalog(self, url, limit=None, concurrency=None):
+        self.started.append(self.store)
+        # Times out if the stores are scraped one after another
+        for _ in range(200):
+            if len(self.started) == len(self.stores):
+                break
+            await asyncio.sleep(0.005)
+        assert len(self.started) == len(self.stores), f"{self.store} scraped alone"
+        if self.fail:
+            raise RuntimeError("store down")
+        return self.products
+
+
+def test_full_sync_scrapes_every_store_at_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(sync_catalog, "supabase", None)
+    monkeypatch.setattr(sync_catalog, "RACKETS_JSON", str(tmp_path / "rackets.json"))
+    name = "Nox AT10 Genius 18K 2025"
+    listings = {
+        "padelmarket": [Product("https://padelmarket.test/at10", name, 200.0, "Nox", "", {})],
+        "padelnuestro": [Product("https://padelnuestro.test/at10", name, 190.0, "Nox", "", {}),
+                         Product("https://padelnuestro.test/ml10", "Nox ML10 Pro Cup 2025", 150.0, "Nox", "", {})],
+        "padelproshop": [],
+    }
+    started, scrapers = [], {}
+
+    def make_scraper(store, http_cache=None, archive=None):
+        scrapers[store] = CatalogStub(store, started, listings, listings[store], fail=store == "padelproshop")
+        return scrapers[store]
+
+    monkeypatch.setattr(sync_catalog, "make_scraper", make_scraper)
+    asyncio.run(sync_catalog.run_full_sync(list(listings), None, False))
+
+    assert sorted(started) == sorted(listings)
+    assert all(scraper.closed for scraper in scrapers.values())
+    # A failing store does not stop the others, whose products are merged together
+    data = RacketManager(str(tmp_path / "rackets.json")).data
+    assert len(data) == 2
+    at10_prices = sorted((p["store"], p["price"]) for p in data["nox-at10-genius-18k-2025"]["prices"])
+    assert at10_prices == [("padelmarket", 200.0), ("padelnuestro", 190.0)]
+
+
+# ── PriceHistoryBuffer ─────────────────────────────────────────────────────────
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits = []
+    monkeypatch.setattr(sync_catalog.time, "sleep", waits.append)
+    return waits
+
+
+def test_price_history_flushes_full_batches_and_the_rest(fake_supabase, sleeps):
+    history = sync_catalog.PriceHistoryBuffer(fake_supabase, dry_run=False, batch_size=3)
+    for i in range(7):
+        history.add(i, "padelmarket", 100.0 + i, None, 0)
+    assert [n for _, _, n in fake_supabase.calls] == [3, 3]
+    history.flush()
+    history.flush()  # nothing left: no empty insert
+    assert [n for _, _, n in fake_supabase.calls] == [3, 3, 1]
+    assert [row["racket_id"] for row in fake_supabase.tables["price_history"]] == list(range(7))
+    assert (history.inserted, history.requests, history.failed) == (7, 3, 0)
+    assert history.summary() == "7 filas en 3 inserts"
+    assert sleeps == []
+
+
+def test_price_history_retries_then_drops_the_batch(fake_supabase, sleeps):
+    attempts = []
+    # The first batch fails twice and then goes through; the second never does
+    fake_supabase.fail = lambda table, op, rows: (
+        attempts.append(rows[0]["racket_id"]) or rows[0]["racket_id"] == 2 or len(attempts) <= 2
+    )
+    history = sync_catalog.PriceHistoryBuffer(fake_supabase, dry_run=False, batch_size=2, retries=2)
+    for i in range(4):
+        history.add(i, "padelnuestro", 50.0, 60.0, 17)
+    history.flush()
+
+    assert attempts == [0, 0, 0, 2, 2, 2]
+    assert sleeps == [0.5, 1.0, 0.5, 1.0]
+    assert [row["racket_id"] for row in fake_supabase.tables["price_history"]] == [0, 1]
+    assert (history.inserted, history.requests, history.failed) == (2, 1, 2)
+    assert history.summary() == "2 filas en 1 inserts, 2 descartadas"
+
+
+def test_price_history_without_auto_flush_only_inserts_on_flush(fake_supabase, sleeps):
+    history = sync_catalog.PriceHistoryBuffer(fake_supabase, dry_run=False, batch_size=2, auto_flush=False)
+    for i in range(5):
+        history.add(i, "padelmarket", 100.0, None, 0)
+    assert fake_supabase.calls == []
+    history.flush()
+    assert [n for _, _, n in fake_supabase.calls] == [2, 2, 1]
+    assert history.summary() == "5 filas en 3 inserts"
+
+
+def test_price_history_dry_run_inserts_nothing(fake_supabase, sleeps):
+    history = sync_catalog.PriceHistoryBuffer(fake_supabase, dry_run=True, batch_size=1)
+    history.add(1, "padelproshop", 80.0, None, 0)
+    history.flush()
+    assert fake_supabase.calls == []
+    assert history.summary() == "0 filas en 0 inserts"
+
+
+# ── mark_discontinued_rackets ──────────────────────────────────────────────────
+
+def _baseline_discontinued(rows, threshold):
+    """The client-side loop the server-side filter replaced."""
+    marked = set()
+    for row in rows:
+        if row["discontinued"]:
+            continue
+        last_seens = [row.get(f"{store}_last_seen") for store in sync_catalog.STORE_CONFIGS]
+        if all(ls is None for ls in last_seens):
+            continue
+        if not any(ls and datetime.fromisoformat(ls.replace("Z", "+00:00")) > threshold for ls in last_seens):
+            marked.add(row["id"])
+    return marked
+
+
+def test_discontinued_filter_matches_the_baseline_loop():
+    now = datetime.now(timezone.utc)
+    days = sync_catalog.DISCONTINUED_THRESHOLD_DAYS
+    ages = [None, None, 1, days - 1, days + 1, 3 * days]
+    rng = random.Random(7)
+    rows = []
+    for i in range(1, 5001):
+        row = {"id": i, "slug": f"pala-{i}", "discontinued": rng.random() < 0.1}
+        for store in sync_catalog.STORE_CONFIGS:
+            age = rng.choice(ages)
+            row[f"{store}_last_seen"] = None if age is None else (now - timedelta(days=age)).isoformat()
+        rows.append(row)
+    expected = _baseline_discontinued(rows, now - timedelta(days=days))
+    assert len(expected) > 1000  # more candidates than one page
+
+    # PostgREST caps every select at max_rows, so the candidates come in pages
+    client = FakeSupabase(max_rows=1000)
+    client.tables["rackets"] = [dict(row) for row in rows]
+    sync_catalog.mark_discontinued_rackets(client, {}, {}, dry_run=False)
+
+    marked = {row["id"] for row in client.tables["rackets"] if row["discontinued"]}
+    already = {row["id"] for row in rows if row["discontinued"]}
+    assert marked - already == expected
+    assert client.count("rackets", "select") >= 2